@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,7 +24,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-qs()$598vzei9nz4er&o8%%19_i^kg-u3_yb9wfx7i7(0$1^t$'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# The production compose file sets DJANGO_DEBUG=0 (nginx then serves /media/ and /static/).
+DEBUG = os.environ.get('DJANGO_DEBUG', '1').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = ['*']
 
@@ -45,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -78,12 +81,61 @@ WSGI_APPLICATION = 'bsu_portal.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite unless DB_ENGINE says otherwise. For MySQL the credentials come from
+# the same variables the database container reads (.db_env).
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': f'django.db.backends.{DB_ENGINE}',
+            'NAME': os.environ.get('DB_NAME', os.environ.get('MYSQL_DATABASE', 'bsu_db')),
+            'USER': os.environ.get('DB_USER', os.environ.get('MYSQL_USER', '')),
+            'PASSWORD': os.environ.get('DB_PASSWORD', os.environ.get('MYSQL_PASSWORD', '')),
+            'HOST': os.environ.get('DB_HOST', 'database'),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'OPTIONS': {'charset': 'utf8mb4'} if DB_ENGINE == 'mysql' else {},
+        }
     }
-}
+
+# Keep each thread's connection open between requests instead of reconnecting
+# every time; a health check before reuse replaces connections the server dropped.
+# Every gunicorn thread holds one, so workers x threads must stay under max_connections.
+# Serving ASGI, set DB_CONN_MAX_AGE=0: async views don't reuse connections this way.
+DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# PostgreSQL (psycopg 3) can pool connections inside each process instead
+if DB_ENGINE == 'postgresql' and os.environ.get('DB_POOL', '').lower() in ('1', 'true', 'yes'):
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+    }
+    # Pooled connections are returned to the pool, not kept per thread
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Optional read replica: the GET-only student endpoints read from it (core.routers).
+# For READ_REPLICA_MAX_LAG seconds after a change, their responses (which are cached
+# and ETagged, core.cache) are built from the primary instead; keep the replica's lag below it.
+READ_REPLICA = None
+READ_REPLICA_MAX_LAG = int(os.environ.get('READ_REPLICA_MAX_LAG', 30))
+if os.environ.get('DB_REPLICA_HOST'):
+    READ_REPLICA = 'replica'
+    DATABASES[READ_REPLICA] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
 
 
 # Password validation
@@ -121,11 +173,21 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
-import os
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Protected downloads (core.downloads): Django checks access, nginx sends the file
+# from its `internal` location for MEDIA_ROOT. Off in development, where Django streams it.
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '').lower() in ('1', 'true', 'yes')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Signed download links stay valid for one to two periods of this many seconds
+DOWNLOAD_LINK_MAX_AGE = int(os.environ.get('DOWNLOAD_LINK_MAX_AGE', 3600))
+
+# Chunked material uploads (core.uploads). Chunks stay under nginx's client_max_body_size.
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 4 * 1024 ** 3))
+UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('UPLOAD_MAX_CHUNK_SIZE', 32 * 1024 ** 2))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -147,6 +209,53 @@ SIMPLE_JWT = {
 }
 
 
+# Cache (dashboard responses, import job progress).
+# Local memory by default; point CACHE_BACKEND at
+# django.core.cache.backends.filebased.FileBasedCache to share it between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'bsu-portal'),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 20000))},
+    }
+}
+
+# Seconds a student's dashboard responses stay cached (changes invalidate them earlier)
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))
+
+# Seconds a doctor's assigned course ids stay cached (assignment changes invalidate them)
+ASSIGNMENT_CACHE_TTL = int(os.environ.get('ASSIGNMENT_CACHE_TTL', 60))
+
+# Route the student dashboard reads to their async versions (core.async_views).
+# Only worth it when serving bsu_portal.asgi; under WSGI each would run in its own event loop.
+ASYNC_STUDENT_VIEWS = os.environ.get('ASYNC_STUDENT_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+# Background spreadsheet imports (core.jobs).
+# Threads per web process; set to 0 and run `manage.py run_import_jobs` for a dedicated worker.
+IMPORT_JOB_WORKERS = int(os.environ.get('IMPORT_JOB_WORKERS', 2))
+# A running job's worker renews its lease (seconds) every third of it; an expired job is run again,
+# at most IMPORT_JOB_MAX_ATTEMPTS times. Pools look for such jobs every IMPORT_JOB_POLL seconds.
+IMPORT_JOB_LEASE = int(os.environ.get('IMPORT_JOB_LEASE', 120))
+IMPORT_JOB_MAX_ATTEMPTS = int(os.environ.get('IMPORT_JOB_MAX_ATTEMPTS', 3))
+IMPORT_JOB_POLL = int(os.environ.get('IMPORT_JOB_POLL', 30))
+
+
+# Request profiling (core.profiling): fraction of requests sampled, 0 to turn it off.
+# Reports at /api/profiling/ and `manage.py profile_report`.
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_BUFFER_SIZE = int(os.environ.get('PROFILING_BUFFER_SIZE', 200))
+PROFILING_PUBLISH_INTERVAL = int(os.environ.get('PROFILING_PUBLISH_INTERVAL', 10))
+
+
+# Seconds before a process rebuilds its student search index from scratch (core.search);
+# changes in between are applied incrementally
+SEARCH_INDEX_MAX_AGE = int(os.environ.get('SEARCH_INDEX_MAX_AGE', 600))
+
+# Seconds browsers may reuse /api/reference/ (departments, levels, years, courses) before
+# revalidating it (the React app adds a new ?rev= after its own changes)
+REFERENCE_DATA_MAX_AGE = int(os.environ.get('REFERENCE_DATA_MAX_AGE', 86400))
+
+
 # Allow React to talk to Django
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -1,6 +1,6 @@
 
 from django.contrib import admin, messages
-from .models import Department, Course, Grade, News, Attendance, Material, AcademicYear, Level, DeletionRequest, TeachingAssignment
+from .models import Department, Course, Grade, News, Attendance, Material, AcademicYear, Level, DeletionRequest, TeachingAssignment, ImportJob, StudentTranscript, Blob
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
     list_display = ('name', 'code')
@@ -50,4 +50,25 @@ class DeletionRequestAdmin(admin.ModelAdmin):
 class TeachingAssignmentAdmin(admin.ModelAdmin):
     list_display = ('doctor', 'course', 'academic_year', 'level', 'semester')
     list_filter = ('academic_year', 'level', 'semester', 'doctor')
-    search_fields = ('doctor__username', 'course__name')
\ No newline at end of file
+    search_fields = ('doctor__username', 'course__name')
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'created_by', 'processed', 'skipped', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+
+@admin.register(StudentTranscript)
+class StudentTranscriptAdmin(admin.ModelAdmin):
+    list_display = ('student', 'gpa', 'total_credits', 'earned_credits', 'updated_at')
+    list_select_related = ('student',)
+    search_fields = ('student__username', 'student__first_name')
+    # Rebuilt from grades (core.transcripts); never edited by hand
+    readonly_fields = ('student', 'gpa', 'total_credits', 'earned_credits', 'graded_courses', 'semesters', 'updated_at')
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'refs', 'created_at')
+    search_fields = ('sha256',)
+    # Counted by core.storage; editing them by hand would lose or leak files
+    readonly_fields = ('sha256', 'size', 'refs', 'created_at')
@@ -0,0 +1,106 @@
+"""
+Grade and attendance statistics for a course, level or department.
+
+Two queries whatever the cohort size: one aggregate (counts, sums for the
+mean and the attendance/score correlation, at-risk students) and one
+GROUP BY score. Marks out of 100 take few distinct values, so the second
+returns a few hundred rows at most; NumPy expands it into the distribution
+for the median, percentiles and letter histogram.
+"""
+import math
+
+import numpy as np
+from django.db.models import Avg, Count, F, FilteredRelation, Max, Min, Q, Sum
+from django.db.models.functions import NullIf
+
+# Lower score bound of each letter, as in Grade.letter_for()
+LETTER_BOUNDS = [50, 65, 75, 85, 90]
+LETTERS = ['F', 'D', 'C', 'B', 'A-', 'A']
+PERCENTILES = [10, 25, 75, 90]
+
+# A student is at risk in a course when failing it or missing too many lectures
+AT_RISK_SCORE = 50
+AT_RISK_ATTENDANCE = 75
+
+
+def _round(value, digits=2):
+    return None if value is None or math.isnan(value) else round(value, digits)
+
+
+def with_attendance(grades):
+    """Annotate each grade with the attendance percentage of the same student and course (one join)."""
+    return grades.annotate(
+        # Through the course, not the user table: one join fewer
+        att=FilteredRelation('course__attendance', condition=Q(course__attendance__student=F('student'))),
+    ).annotate(
+        attendance=F('att__attended_lectures') * 100.0 / NullIf(F('att__total_lectures'), 0),
+    )
+
+
+def correlation(n, sx, sy, sxx, syy, sxy):
+    """Pearson's r from running sums; None when undefined (too few points, or no spread)."""
+    if not n or n < 2:
+        return None
+    cov = n * sxy - sx * sy
+    var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+    if var <= 0:
+        return None
+    return cov / math.sqrt(var)
+
+
+def grade_statistics(grades):
+    """Statistics over a Grade queryset (already filtered to the cohort)."""
+    graded = with_attendance(grades.filter(score__isnull=False))
+    paired = Q(attendance__isnull=False)
+
+    # 1. Everything that sums up
+    totals = graded.aggregate(
+        graded=Count('id'),
+        students=Count('student', distinct=True),
+        mean=Avg('score'),
+        min=Min('score'),
+        max=Max('score'),
+        attendance_mean=Avg('attendance'),
+        paired=Count('id', filter=paired),
+        sx=Sum('score', filter=paired),
+        sy=Sum('attendance'),
+        sxx=Sum(F('score') * F('score'), filter=paired),
+        syy=Sum(F('attendance') * F('attendance')),
+        sxy=Sum(F('score') * F('attendance')),
+        at_risk=Count('student', distinct=True,
+                      filter=Q(score__lt=AT_RISK_SCORE) | Q(attendance__lt=AT_RISK_ATTENDANCE)),
+    )
+
+    # 2. Score distribution, expanded from (score, count) pairs
+    distribution = np.array(
+        grades.filter(score__isnull=False).order_by().values_list('score').annotate(n=Count('id')),
+        dtype=float,
+    ).reshape(-1, 2)
+    scores = np.repeat(distribution[:, 0], distribution[:, 1].astype(int))
+
+    if scores.size:
+        median = float(np.median(scores))
+        std = float(scores.std())
+        percentiles = dict(zip((f'p{p}' for p in PERCENTILES), np.percentile(scores, PERCENTILES).tolist()))
+        letter_counts = np.bincount(np.digitize(scores, LETTER_BOUNDS), minlength=len(LETTERS))
+    else:
+        median = std = None
+        percentiles = {f'p{p}': None for p in PERCENTILES}
+        letter_counts = [0] * len(LETTERS)
+
+    r = correlation(totals['paired'], totals['sx'], totals['sy'], totals['sxx'], totals['syy'], totals['sxy'])
+    return {
+        'students': totals['students'],
+        'graded': totals['graded'],
+        'mean': _round(totals['mean']),
+        'median': _round(median),
+        'std': _round(std),
+        'min': totals['min'],
+        'max': totals['max'],
+        'percentiles': {name: _round(value) for name, value in percentiles.items()},
+        'letters': {letter: int(count) for letter, count in zip(LETTERS, letter_counts)},
+        'attendance_mean': _round(totals['attendance_mean']),
+        'attendance_score_correlation': _round(r, 3),
+        'at_risk': totals['at_risk'],
+        'at_risk_rule': {'score_below': AT_RISK_SCORE, 'attendance_below': AT_RISK_ATTENDANCE},
+    }
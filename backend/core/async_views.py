@@ -0,0 +1,150 @@
+"""
+Async twins of the read-heavy student endpoints, for the ASGI stack.
+
+DRF views are synchronous, so these are plain Django async views: they
+authenticate the JWT themselves, query with the async ORM and render with
+DRF's serializers and JSON renderer. Responses, ETags and cache entries are
+identical to the sync views in core.views, which stay the default.
+core.urls routes to these when settings.ASYNC_STUDENT_VIEWS is on.
+"""
+import datetime
+import functools
+
+from django.views.decorators.http import require_safe
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import User
+from .cache import JSONResponse, acached_per_user, aconditional_get
+from .models import Attendance, Course, Exam, Grade, News
+from .routers import read_from_replica
+from .serializers import AttendanceSerializer, CourseSerializer, ExamSerializer, GradeSerializer, NewsSerializer
+
+
+async def authenticate(request):
+    """The user behind the request's Bearer token, or None when there is no token."""
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    # Token validation is pure computation; only the user lookup hits the DB
+    token = auth.get_validated_token(raw_token)
+    try:
+        user = await User.objects.aget(**{api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM]})
+    except (KeyError, User.DoesNotExist):
+        raise AuthenticationFailed("User not found", code='user_not_found')
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code='user_inactive')
+    return user
+
+
+def login_required(view):
+    """Same outcome as DRF's JWTAuthentication + IsAuthenticated: 401 without a valid token."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await authenticate(request)
+        except AuthenticationFailed as exc:
+            return unauthorized(exc.detail)
+        if user is None:
+            return unauthorized({"detail": "Authentication credentials were not provided."})
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def unauthorized(detail):
+    if not isinstance(detail, dict):
+        detail = {"detail": detail}
+    return JSONResponse(detail, status=status.HTTP_401_UNAUTHORIZED,
+                        headers={'WWW-Authenticate': 'Bearer realm="api"'})
+
+
+async def student_course_context(user, courses):
+    """core.views.student_course_context() with the async ORM (still three queries)."""
+    course_ids = [c.id for c in courses]
+
+    grades = Grade.objects.filter(student=user, course_id__in=course_ids)
+    attendance = Attendance.objects.filter(student=user, course_id__in=course_ids)
+
+    next_exams = {}
+    upcoming = Exam.objects.filter(
+        course_id__in=course_ids, date__gte=datetime.date.today()
+    ).order_by('date', 'time')
+    async for exam in upcoming:
+        next_exams.setdefault(exam.course_id, exam)
+
+    return {
+        'grades': {g.course_id: g async for g in grades},
+        'attendance': {a.course_id: a async for a in attendance},
+        'next_exams': next_exams,
+    }
+
+
+@require_safe
+@login_required
+@acached_per_user('courses', scopes=('user', 'cohort', 'courses'))
+@read_from_replica
+async def get_courses(request):
+    user = request.user
+
+    if user.role == 'STUDENT':
+        if not user.department_id or not user.level_id:
+            return JSONResponse([])
+        courses = Course.objects.filter(department_id=user.department_id, level_id=user.level_id)
+    else:
+        courses = Course.objects.all()
+
+    courses = [c async for c in courses.select_related('department', 'level')]
+    context = await student_course_context(user, courses)
+    return JSONResponse(CourseSerializer(courses, many=True, context=context).data)
+
+
+@require_safe
+@login_required
+@acached_per_user('student_exams', scopes=('cohort', 'courses'))
+@read_from_replica
+async def get_student_exams(request):
+    user = request.user
+
+    if user.role != 'STUDENT':
+        return JSONResponse({"error": "Students only"}, status=403)
+    if not user.department_id or not user.level_id:
+        return JSONResponse([])
+
+    exams = Exam.objects.filter(
+        course__department_id=user.department_id,
+        course__level_id=user.level_id
+    ).select_related('course').order_by('date', 'time')
+    return JSONResponse(ExamSerializer([e async for e in exams], many=True).data)
+
+
+@require_safe
+@login_required
+@acached_per_user('my_grades', scopes=('user', 'courses'))
+@read_from_replica
+async def get_my_grades(request):
+    my_grades = Grade.objects.filter(student=request.user).select_related(
+        'course', 'student__department', 'student__level'
+    )
+    return JSONResponse(GradeSerializer([g async for g in my_grades], many=True).data)
+
+
+@require_safe
+@aconditional_get('news', scopes=('news',))
+@read_from_replica
+async def get_news(request):
+    news = News.objects.filter(is_public=True)
+    return JSONResponse(NewsSerializer([n async for n in news], many=True).data)
+
+
+@require_safe
+@login_required
+@acached_per_user('my_attendance', scopes=('user', 'courses'))
+@read_from_replica
+async def get_my_attendance(request):
+    attendance = Attendance.objects.filter(student=request.user).select_related('course').order_by('-id')
+    return JSONResponse(AttendanceSerializer([a async for a in attendance], many=True).data)
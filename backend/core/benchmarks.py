@@ -0,0 +1,143 @@
+"""
+Timings of the portal's hot paths, for `manage.py benchmark`.
+
+Each case is a request made through the test client against whatever data
+is in the database (the command seeds a scratch one with core.synthetic):
+the spreadsheet uploads, the student course list, a doctor's grade sheet,
+the student listing and every admin changelist. Every case runs once to
+warm up, then `repeat` times with the response cache cleared, and reports
+latency percentiles and its query count. Results are plain dicts, so runs
+can be saved as JSON and compared.
+"""
+import io
+import itertools
+import statistics
+import time
+
+import openpyxl
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .exports import ATTENDANCE_EXPORT_COLUMNS, attendance_rows, grade_rows
+from .importers import GRADE_COLUMNS, STUDENT_COLUMNS
+from .models import Course, Grade
+from .profiling import QueryTimer
+from users.models import User
+
+
+def sheet(header, rows):
+    """.xlsx content in the format of exel/*.xlsx."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _rows(row_source, courses, limit):
+    return list(itertools.islice(itertools.chain.from_iterable(row_source(c) for c in courses), limit))
+
+
+def cases(upload_rows, student_rows):
+    """{name: (client, method, url, data builder)} for the seeded database."""
+    superuser = User.objects.filter(is_superuser=True).first() or User.objects.create(
+        username='benchmark_admin', role='ADMIN', is_staff=True, is_superuser=True
+    )
+    grade = Grade.objects.select_related('student', 'course').order_by('id').first()
+    student, course = grade.student, grade.course
+    doctor = course.teachingassignment_set.select_related('doctor').first().doctor
+    courses = list(Course.objects.order_by('id'))
+
+    # Re-uploading exported rows is an update of every row; new student ids are inserts
+    grades = sheet(GRADE_COLUMNS, _rows(grade_rows, courses, upload_rows))
+    attendance = sheet(ATTENDANCE_EXPORT_COLUMNS, _rows(attendance_rows, courses, upload_rows))
+    # A new batch of student ids every run, so each one measures inserts
+    batches = itertools.count()
+
+    def new_students():
+        batch = next(batches)
+        return sheet(STUDENT_COLUMNS, [
+            (student.department.name, student.level.name, f'bench{batch:04d}{i:06d}', f'Benchmark Student {i}')
+            for i in range(student_rows)
+        ])
+
+    def api(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def upload(name, content):
+        # A fresh file object per request; `content` may build the bytes on each call
+        return lambda: {'file': SimpleUploadedFile(name, content() if callable(content) else content)}
+
+    browser = Client()
+    browser.force_login(superuser)
+
+    staff = api(superuser)
+    found = {
+        f'upload grades ({upload_rows} rows)': (staff, 'post', '/api/upload-grades/', upload('grades.xlsx', grades)),
+        f'upload attendance ({upload_rows} rows)': (
+            staff, 'post', '/api/upload-attendance/', upload('attendance.xlsx', attendance)
+        ),
+        # Each new student costs a password hash (PBKDF2), far more than any query
+        f'upload students ({student_rows} new)': (
+            staff, 'post', '/api/upload-students/', upload('students.xlsx', new_students)
+        ),
+        'get_courses (student)': (api(student), 'get', '/api/courses/', None),
+        'ManageGradesView (one course)': (api(doctor), 'get', f'/api/doctor/grades/?course_id={course.id}', None),
+        'list_students (one cohort)': (
+            staff, 'get', f'/api/students/?dept={student.department.name}&level={student.level.name}', None
+        ),
+        'list_students (first page)': (staff, 'get', '/api/students/', None),
+    }
+    # Every changelist the admin has (users, courses, assignments, transcripts ...)
+    for model in admin.site._registry:
+        name = f'{model._meta.app_label}_{model._meta.model_name}_changelist'
+        found[f'admin {name}'] = (browser, 'get', reverse(f'admin:{name}'), None)
+    return found
+
+
+def _time(client, method, url, data):
+    timer = QueryTimer()
+    kwargs = {'format': 'multipart'} if isinstance(client, APIClient) and data else {}
+    cache.clear()
+    start = time.perf_counter()
+    with connection.execute_wrapper(timer):
+        response = getattr(client, method)(url, data() if data else None, **kwargs)
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+    return (time.perf_counter() - start) * 1000, timer.count, response.status_code
+
+
+def run_benchmarks(repeat=5, upload_rows=2000, student_rows=20, only=None):
+    """Time every case; returns {name: {runs, ms: {...}, queries, status}}."""
+    results = {}
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], IMPORT_JOB_WORKERS=0):
+        for name, (client, method, url, data) in cases(upload_rows, student_rows).items():
+            if only and not any(word.lower() in name.lower() for word in only):
+                continue
+            _time(client, method, url, data)  # warm up
+            runs = [_time(client, method, url, data) for _ in range(repeat)]
+            ms = sorted(r[0] for r in runs)
+            results[name] = {
+                'runs': repeat,
+                'ms': {
+                    'min': round(ms[0], 2),
+                    'median': round(statistics.median(ms), 2),
+                    'p95': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 2),
+                    'mean': round(statistics.fmean(ms), 2),
+                },
+                'queries': runs[-1][1],
+                'status': runs[-1][2],
+            }
+    return results
@@ -0,0 +1,281 @@
+"""
+Versioned responses for the read endpoints: a per-student response cache and
+conditional GET (ETag / If-None-Match).
+
+Responses are keyed by the current version of every "scope" they depend on:
+
+    user:<id>                 the student's grades, attendance, profile
+    cohort:<dept>:<level>     exams of that department + level
+    courses                   the course catalogue (names, codes, levels)
+    reference                 departments, levels, years and courses (core.reference)
+    news                      public news
+    materials:<course_id>     a course's uploaded materials
+    records:<course_id>       grades and attendance of a course (analytics)
+
+Signals (core.signals) and the bulk importers bump a scope's version when its
+data changes, so old entries are never read again and simply expire. The same
+versions make a cheap ETag: a matching If-None-Match is answered with 304
+before the view runs.
+
+A version token records when it was created, i.e. the first read after the
+change. Until it is READ_REPLICA_MAX_LAG seconds old, responses are built
+from the primary even in @read_from_replica views: a lagging replica could
+still return the old rows, which would then be cached (and ETagged) under
+the new version.
+"""
+import functools
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .routers import pin_to_primary
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+def cohort_scope(department_id, level_id):
+    return f"cohort:{department_id}:{level_id}"
+
+
+COURSES_SCOPE = 'courses'
+NEWS_SCOPE = 'news'
+REFERENCE_SCOPE = 'reference'
+
+
+def materials_scope(course_id):
+    return f"materials:{course_id}"
+
+
+def records_scope(course_id):
+    return f"records:{course_id}"
+
+
+def _version_key(scope):
+    return f"dash:version:{scope}"
+
+
+def _new_version():
+    return f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+
+
+def _recent(versions):
+    """True if any version was created less than READ_REPLICA_MAX_LAG seconds ago."""
+    if not settings.READ_REPLICA:
+        return False
+    cutoff = time.time() - settings.READ_REPLICA_MAX_LAG
+    for version in versions:
+        created, _, _ = str(version).partition('-')
+        # Tokens from before the timestamp was added count as old
+        if created.isdigit() and int(created) > cutoff:
+            return True
+    return False
+
+
+def scope_versions(scopes):
+    """Current version token of each scope, creating missing ones."""
+    keys = [_version_key(s) for s in scopes]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            # add() is atomic, so concurrent requests agree on one token
+            cache.add(key, _new_version(), None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+async def ascope_versions(scopes):
+    """scope_versions() for async views."""
+    keys = [_version_key(s) for s in scopes]
+    found = await cache.aget_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, _new_version(), None)
+            found[key] = await cache.aget(key)
+        versions.append(found[key])
+    return versions
+
+
+def invalidate(*scopes):
+    """Drop the version of each scope once the current transaction commits."""
+    keys = [_version_key(s) for s in scopes]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_users(user_ids):
+    invalidate(*(user_scope(pk) for pk in set(user_ids)))
+
+
+def invalidate_records(course_ids):
+    invalidate(*(records_scope(pk) for pk in set(course_ids)))
+
+
+def cached_result(name, scopes, compute, timeout=None):
+    """compute(), cached until one of `scopes` changes (for results that aren't a whole response)."""
+    versions = scope_versions(scopes)
+    key = "calc:%s:%s" % (name, hashlib.md5(":".join(versions).encode()).hexdigest())
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout if timeout is not None else settings.DASHBOARD_CACHE_TTL)
+    return value
+
+
+# --- Decorators ---
+
+def resolve_scopes(user, names, view_kwargs):
+    # 'user' and 'cohort' depend on the requester; others may use URL kwargs,
+    # e.g. 'materials:{course_id}'
+    scopes = []
+    for name in names:
+        if name == 'user':
+            scopes.append(user_scope(user.id))
+        elif name == 'cohort':
+            scopes.append(cohort_scope(user.department_id, user.level_id))
+        else:
+            scopes.append(name.format(**view_kwargs))
+    return scopes
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(":".join(parts).encode()).hexdigest()
+
+
+def _not_modified(request, etag):
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in client_etags or '*' in client_etags
+
+
+def _response_key(view_name, user, per_user, versions):
+    owner = str(user.id) if per_user else 'all'
+    return ":".join(["dash", view_name, owner, *versions])
+
+
+def _set_validators(response, etag, per_user, max_age=None):
+    response['ETag'] = etag
+    if max_age:
+        # Browsers reuse the copy for max_age seconds, then revalidate it; proxies don't keep it
+        response['Cache-Control'] = f'private, max-age={max_age}'
+    else:
+        # Browsers keep the copy but revalidate it on every use
+        response['Cache-Control'] = 'private, no-cache' if per_user else 'no-cache'
+    if per_user:
+        response['Vary'] = 'Authorization'
+    return response
+
+
+def _versioned(view_name, scopes, per_user, cache_timeout, max_age=None, key_part=None):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            user = request.user
+            versions = scope_versions(resolve_scopes(user, scopes, kwargs))
+            primary = _recent(versions)
+            if key_part:
+                versions.append(str(key_part()))
+            key = _response_key(view_name, user, per_user, versions)
+            etag = make_etag(key)
+
+            # 1. The client already has this version
+            if _not_modified(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            # 2. Served from the cache, or rendered and stored
+            else:
+                data = cache.get(key) if cache_timeout else None
+                if data is not None:
+                    response = Response(data)
+                else:
+                    with pin_to_primary(primary):
+                        response = view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    if cache_timeout:
+                        cache.set(key, response.data, cache_timeout)
+
+            return _set_validators(response, etag, per_user, max_age)
+        return wrapper
+    return decorator
+
+
+def cached_per_user(view_name, scopes=('user',)):
+    """
+    Cache a read-only DRF function view's 200 responses per user, with ETags.
+    Goes under @api_view/@permission_classes, so `request.user` is authenticated.
+    """
+    return _versioned(view_name, scopes, per_user=True, cache_timeout=settings.DASHBOARD_CACHE_TTL)
+
+
+def conditional_get(view_name, scopes, per_user=False, max_age=None, key_part=None):
+    """
+    ETag / 304 support only, for responses that are cheap to rebuild or shared by everyone.
+    With `max_age`, browsers may reuse a response that long without asking. `key_part()`
+    is added to the versions, for bodies that also change with something else (e.g. time).
+    """
+    return _versioned(
+        view_name, scopes, per_user=per_user, cache_timeout=None, max_age=max_age, key_part=key_part
+    )
+
+
+# --- Async views (core.async_views) ---
+
+class JSONResponse(HttpResponse):
+    """
+    JSON rendered exactly like DRF's Response, keeping `.data` so the async
+    views share cache entries with their sync twins.
+    """
+    def __init__(self, data, status=200, **kwargs):
+        super().__init__(JSONRenderer().render(data), content_type='application/json', status=status, **kwargs)
+        self.data = data
+
+
+def _aversioned(view_name, scopes, per_user, cache_timeout):
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # Public views run without login_required; never touch the session user here
+            user = getattr(request, 'user', None)
+            versions = await ascope_versions(resolve_scopes(user, scopes, kwargs))
+            primary = _recent(versions)
+            key = _response_key(view_name, user, per_user, versions)
+            etag = make_etag(key)
+
+            if _not_modified(request, etag):
+                response = HttpResponseNotModified()
+            else:
+                data = await cache.aget(key) if cache_timeout else None
+                if data is not None:
+                    response = JSONResponse(data)
+                else:
+                    with pin_to_primary(primary):
+                        response = await view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    if cache_timeout:
+                        await cache.aset(key, response.data, cache_timeout)
+
+            return _set_validators(response, etag, per_user)
+        return wrapper
+    return decorator
+
+
+def acached_per_user(view_name, scopes=('user',)):
+    """cached_per_user() for async views; goes under the authentication decorator."""
+    return _aversioned(view_name, scopes, per_user=True, cache_timeout=settings.DASHBOARD_CACHE_TTL)
+
+
+def aconditional_get(view_name, scopes, per_user=False):
+    return _aversioned(view_name, scopes, per_user=per_user, cache_timeout=None)
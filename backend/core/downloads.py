@@ -0,0 +1,91 @@
+"""
+Protected downloads of uploaded materials and certificates.
+
+Django only checks access; the bytes are sent by nginx. With
+MEDIA_ACCEL_REDIRECT on, the response is an empty X-Accel-Redirect to
+nginx's `internal` location for the media volume (see nginx/default.conf),
+so no worker is held for the transfer. Without it (development) Django
+streams the file itself.
+
+Browsers follow plain links without the JWT header, so the serializers
+hand out URLs signed for the requesting user. A download is allowed with
+either the header or a valid, unexpired signature, and access is checked
+again for that user at download time. Links are signed per period of
+DOWNLOAD_LINK_MAX_AGE seconds and expire at the end of the next one, so
+every response in a period carries the same links (and the same ETag) and
+each link works for one to two periods.
+"""
+import mimetypes
+import os
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+
+from .models import Certificate, Material
+from .permissions import is_assigned
+
+SALT = 'core.downloads'
+
+
+def can_download_material(user, material):
+    if user.role == 'STUDENT':
+        # Enrolled = the course belongs to the student's department and level
+        course = material.course
+        return (course.department_id, course.level_id) == (user.department_id, user.level_id)
+    return is_assigned(user, material.course_id)
+
+
+def can_download_certificate(user, certificate):
+    if user.role == 'STUDENT':
+        # Same rule as get_my_certificate
+        return certificate.student_id == user.id and user.level is not None and user.level.name == "Fourth Year"
+    return user.role in ('STAFF_AFFAIRS', 'ADMIN')
+
+
+FILES = {
+    'material': (Material.objects.select_related('course'), can_download_material),
+    'certificate': (Certificate.objects.all(), can_download_certificate),
+}
+
+
+def link_period():
+    return int(time.time()) // settings.DOWNLOAD_LINK_MAX_AGE
+
+
+def download_url(kind, pk, user=None):
+    """API URL of a file; signed for `user` so it also works as a plain link."""
+    url = reverse('download_file', kwargs={'kind': kind, 'pk': pk})
+    if user is not None and user.is_authenticated:
+        expires = (link_period() + 2) * settings.DOWNLOAD_LINK_MAX_AGE
+        url += '?sig=' + signing.dumps([kind, pk, user.pk, expires], salt=SALT)
+    return url
+
+
+def signed_user_id(sig, kind, pk):
+    """The user a download link was signed for, or None (also once it expired)."""
+    try:
+        signed_kind, signed_pk, user_id, expires = signing.loads(sig, salt=SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if (signed_kind, signed_pk) != (kind, pk) or expires <= time.time():
+        return None
+    return user_id
+
+
+def file_response(field_file):
+    filename = os.path.basename(field_file.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        # The file on disk: shared blobs don't live at their stored name (see core.storage)
+        on_disk = os.path.relpath(field_file.path, settings.MEDIA_ROOT).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX + on_disk)
+        response['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(filename)}"
+        return response
+
+    return FileResponse(field_file.open('rb'), filename=filename, content_type=content_type)
@@ -0,0 +1,97 @@
+"""
+Streaming exports in the upload formats (exel/*.xlsx), so an exported
+sheet can be edited and uploaded again.
+
+Rows come straight from the database as tuples (.values_list().iterator()),
+never as model instances. CSV is written while it downloads; XLSX goes
+through openpyxl's write-only mode into a temporary file first, because the
+zip container can't be streamed, and is then sent from disk. Either way
+memory use does not depend on the number of rows.
+"""
+import csv
+import tempfile
+
+import openpyxl
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.text import slugify
+
+from .importers import GRADE_COLUMNS, STUDENT_COLUMNS
+from .models import Attendance, Grade
+
+CHUNK_SIZE = 2000
+
+ATTENDANCE_EXPORT_COLUMNS = (
+    'department', 'level', 'semester', 'course_name', 'student_id', 'student_name',
+    'attended_lectures', 'total_lectures',
+)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def grade_rows(course):
+    return Grade.objects.filter(course=course).order_by('student__username').values_list(
+        'student__department__name', 'student__level__name', 'semester',
+        'student__username', 'student__first_name', 'course__name', 'score',
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def attendance_rows(course):
+    return Attendance.objects.filter(course=course).order_by('student__username').values_list(
+        'student__department__name', 'student__level__name', 'course__semester', 'course__name',
+        'student__username', 'student__first_name', 'attended_lectures', 'total_lectures',
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def student_rows(students):
+    return students.order_by('username').values_list(
+        'department__name', 'level__name', 'username', 'first_name',
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+EXPORT_COLUMNS = {
+    'grades': GRADE_COLUMNS,
+    'attendance': ATTENDANCE_EXPORT_COLUMNS,
+    'students': STUDENT_COLUMNS,
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+    def write(self, value):
+        return value
+
+
+def csv_response(filename, header, rows):
+    writer = csv.writer(_Echo())
+
+    def lines():
+        # BOM so Excel opens Arabic names as UTF-8; the upload reader skips it
+        yield '\ufeff' + writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(['' if value is None else value for value in row])
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(filename, header, rows):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+
+    # Deleted as soon as FileResponse closes it
+    tmp = tempfile.TemporaryFile()
+    wb.save(tmp)
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
+
+
+def export_response(kind, name, rows, file_type='csv'):
+    """A download of `rows` with the columns of `kind` ('grades', 'attendance' or 'students')."""
+    filename = slugify(f'{kind} {name}') or kind
+    if file_type == 'xlsx':
+        return xlsx_response(filename, EXPORT_COLUMNS[kind], rows)
+    return csv_response(filename, EXPORT_COLUMNS[kind], rows)
@@ -0,0 +1,383 @@
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .cache import invalidate_records, invalidate_users
+from .readers import MissingColumnError, SheetReader
+from .search import students_changed
+from .models import Attendance, Grade, upsert
+from .permissions import is_assigned
+from .reference import AmbiguousName, fold, reference_data
+from .transcripts import refresh_transcripts
+
+User = get_user_model()
+
+# Rows are resolved and written in batches of this size.
+# Every batch costs a fixed number of queries, whatever the sheet length.
+BATCH_SIZE = 1000
+
+# Per-row diagnostics kept for one import; further skips are only counted
+MAX_REPORTED_ERRORS = 500
+
+# Format: department | level | semester | student_id | student_name | course_name | score
+GRADE_COLUMNS = ('department', 'level', 'semester', 'student_id', 'student_name', 'course_name', 'score')
+
+ATTENDANCE_COLUMNS = ('student_id', 'course_name', 'attended_lectures', 'total_lectures')
+
+STUDENT_COLUMNS = ('department', 'level', 'student_id', 'student_name')
+
+
+class NotAssignedError(Exception):
+    def __init__(self, course_name):
+        super().__init__(course_name)
+        self.course_name = course_name
+
+
+class ImportResult:
+    """Counters and per-row diagnostics for one spreadsheet import."""
+
+    def __init__(self):
+        self.processed = 0
+        self.skipped = 0
+        self.errors = []
+        self.timings = {}  # phase -> seconds, summed over all batches
+
+    def skip(self, row_number, message, student_id=None):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "student_id": student_id, "error": message})
+
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = self.timings.get(phase, 0) + time.perf_counter() - start
+
+    def as_dict(self):
+        data = {"processed": self.processed, "skipped": self.skipped, "errors": self.errors}
+        if self.timings:
+            data["timings"] = {phase: round(secs, 3) for phase, secs in self.timings.items()}
+        return data
+
+
+# --- Helpers ---
+
+def clean_text(value):
+    # Empty cells arrive as None (xlsx) or '' (csv)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    # Excel stores IDs like 30101010000001 as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CourseResolver:
+    """
+    Case-insensitive course-name lookup shared by all batches of one import.
+    Names are resolved from the process's reference data (core.reference),
+    and a doctor's ownership is checked once per distinct course against
+    their cached assignments (core.permissions).
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.reference = reference_data.get()
+        self.by_name = {}  # case-folded name -> (course id, error message)
+
+    def load(self, names):
+        for name in names:
+            key = fold(name)
+            if not key or key in self.by_name:
+                continue
+            try:
+                course_id = self.reference.get_id('course', name)
+            except AmbiguousName as e:
+                self.by_name[key] = (None, str(e))
+                continue
+            if course_id is None:
+                self.by_name[key] = (None, f"Course '{name}' not found")
+                continue
+            # Security Check (Doctor Ownership), once per new course
+            if not is_assigned(self.user, course_id):
+                raise NotAssignedError(name)
+            self.by_name[key] = (course_id, None)
+
+    def get(self, name):
+        """Return (course_id, error message)."""
+        return self.by_name.get(fold(name), (None, f"Course '{name}' not found"))
+
+
+def students_by_username(usernames):
+    return dict(
+        User.objects.filter(username__in=set(usernames)).values_list('username', 'id')
+    )
+
+
+# --- Grades ---
+
+def import_grades(rows, user, batch_size=BATCH_SIZE, progress=None):
+    """
+    Upsert grades from spreadsheet rows.
+
+    `rows` yields (row_number, dict) pairs. Everything runs in one
+    transaction, so a doctor uploading a course they don't teach
+    leaves the table untouched. `progress(result)` is called after
+    every batch.
+    """
+    result = ImportResult()
+    courses = CourseResolver(user)
+
+    with transaction.atomic():
+        for chunk in chunked(rows, batch_size):
+            parsed = []
+            for row_number, row in chunk:
+                parsed.append((
+                    row_number,
+                    clean_text(row['student_id']),
+                    clean_text(row['course_name']),
+                    clean_text(row['semester']),
+                    row['score'],
+                ))
+
+            # 1. Resolve every course and student of the batch at once
+            courses.load(p[2] for p in parsed)
+            students = students_by_username(p[1] for p in parsed)
+
+            # 2. Build the grade rows (a later row for the same pair wins)
+            grades = {}
+            for row_number, student_id, course_name, semester, score in parsed:
+                course_id, error = courses.get(course_name)
+                if error:
+                    result.skip(row_number, error, student_id)
+                    continue
+                if student_id not in students:
+                    result.skip(row_number, f"Student {student_id} not found", student_id)
+                    continue
+                if clean_text(score) == '':
+                    score = None
+                else:
+                    try:
+                        score = float(score)
+                    except (TypeError, ValueError):
+                        result.skip(row_number, f"Invalid score '{score}'", student_id)
+                        continue
+
+                key = (students[student_id], course_id)
+                grades[key] = Grade(
+                    student_id=key[0], course_id=course_id, score=score, semester=semester
+                )
+                result.processed += 1
+
+            # 3. One upsert for the whole batch
+            if grades:
+                upsert(Grade, grades.values(), ['student', 'course'], ['score', 'semester'])
+                # bulk_create sends no signals; drop the students' cached dashboards
+                # and rebuild their transcripts
+                invalidate_users(student_id for student_id, _ in grades)
+                invalidate_records(course_id for _, course_id in grades)
+                refresh_transcripts(student_id for student_id, _ in grades)
+            if progress:
+                progress(result)
+
+    return result
+
+
+# --- Attendance ---
+
+def import_attendance(rows, user, batch_size=BATCH_SIZE, progress=None):
+    """
+    Upsert attendance summaries from spreadsheet rows.
+
+    Same contract as import_grades: (row_number, dict) pairs in, an
+    ImportResult out, one transaction and a fixed number of queries per batch.
+    A sheet for a single course resolves that course exactly once.
+    """
+    result = ImportResult()
+    courses = CourseResolver(user)
+
+    with transaction.atomic():
+        for chunk in chunked(rows, batch_size):
+            parsed = [
+                (row_number, clean_text(row['student_id']), clean_text(row['course_name']),
+                 row['attended_lectures'], row['total_lectures'])
+                for row_number, row in chunk
+            ]
+
+            # 1. Resolve every course and student of the batch at once
+            courses.load(p[2] for p in parsed)
+            students = students_by_username(p[1] for p in parsed)
+
+            # 2. Build the attendance rows
+            records = {}
+            for row_number, student_id, course_name, attended, total in parsed:
+                course_id, error = courses.get(course_name)
+                if error:
+                    result.skip(row_number, error, student_id)
+                    continue
+                if student_id not in students:
+                    result.skip(row_number, f"Student {student_id} not found", student_id)
+                    continue
+                try:
+                    attended = int(float(attended))
+                    total = int(float(total))
+                except (TypeError, ValueError):
+                    result.skip(row_number, "Lecture counts must be numbers", student_id)
+                    continue
+
+                key = (students[student_id], course_id)
+                records[key] = Attendance(
+                    student_id=key[0], course_id=course_id,
+                    attended_lectures=attended, total_lectures=total,
+                )
+                result.processed += 1
+
+            # 3. One upsert for the whole batch
+            if records:
+                upsert(
+                    Attendance, records.values(), ['student', 'course'], ['attended_lectures', 'total_lectures']
+                )
+                invalidate_users(student_id for student_id, _ in records)
+                invalidate_records(course_id for _, course_id in records)
+            if progress:
+                progress(result)
+
+    return result
+
+
+# --- Students ---
+
+def hash_passwords(raw_passwords):
+    """
+    Hash many passwords at once on a thread pool.
+
+    PBKDF2 runs inside OpenSSL with the GIL released, so threads use
+    every core without forking a worker that holds open DB connections.
+    """
+    workers = getattr(settings, 'IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+    if workers == 1 or len(raw_passwords) < 2:
+        return [make_password(p) for p in raw_passwords]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(make_password, raw_passwords))
+
+
+def import_students(rows, user=None, batch_size=BATCH_SIZE, progress=None):
+    """
+    Create or update student accounts from a roster sheet.
+
+    New students get their Student ID as password, as before. The result
+    carries `created`/`updated` counts and per-phase timings. `user` is
+    unused; it keeps the signature in line with the other importers.
+    """
+    result = ImportResult()
+    result.created = 0
+    result.updated = 0
+
+    with result.timer('lookup'):
+        # Case-insensitive, e.g. "electrical" vs "Electrical"
+        reference = reference_data.get()
+
+    with transaction.atomic():
+        for chunk in chunked(rows, batch_size):
+            # 1. Validate rows against the Department/Level names
+            with result.timer('parse'):
+                wanted = {}
+                for row_number, row in chunk:
+                    dept_name = clean_text(row['department'])
+                    level_name = clean_text(row['level'])
+                    username = clean_text(row['student_id'])
+                    try:
+                        department_id = reference.get_id('department', dept_name)
+                        level_id = reference.get_id('level', level_name)
+                    except AmbiguousName as e:
+                        result.skip(row_number, str(e), username)
+                        continue
+                    if department_id is None or level_id is None:
+                        result.skip(
+                            row_number,
+                            f"Dept '{dept_name}' or Level '{level_name}' not found.",
+                            username,
+                        )
+                        continue
+                    wanted[username] = (clean_text(row['student_name']), department_id, level_id)
+
+            with result.timer('lookup'):
+                existing = {
+                    u.username: u for u in User.objects.filter(username__in=wanted.keys())
+                }
+
+            # 2. Hash passwords for the new accounts only (Password = Student ID)
+            new_usernames = [u for u in wanted if u not in existing]
+            with result.timer('hash'):
+                passwords = hash_passwords(new_usernames)
+
+            # 3. One insert and one update for the whole batch
+            with result.timer('write'):
+                to_create = []
+                for username, password in zip(new_usernames, passwords):
+                    full_name, department_id, level_id = wanted[username]
+                    to_create.append(User(
+                        username=username, password=password, first_name=full_name,
+                        role='STUDENT', department_id=department_id, level_id=level_id,
+                    ))
+                to_update = []
+                for username, user in existing.items():
+                    user.first_name, user.department_id, user.level_id = wanted[username]
+                    user.role = 'STUDENT'
+                    to_update.append(user)
+
+                User.objects.bulk_create(to_create)
+                User.objects.bulk_update(
+                    to_update, ['first_name', 'role', 'department', 'level'], batch_size=batch_size
+                )
+                invalidate_users(user.pk for user in to_update)
+                # MySQL returns no ids from bulk_create; new students are found by username
+                students_changed(ids=[user.pk for user in to_update], usernames=[user.username for user in to_create])
+
+            result.created += len(to_create)
+            result.updated += len(to_update)
+            result.processed += len(wanted)
+            if progress:
+                progress(result)
+
+    return result
+
+
+# --- Whole sheets ---
+
+SHEET_IMPORTERS = {
+    'GRADES': (GRADE_COLUMNS, import_grades),
+    'ATTENDANCE': (ATTENDANCE_COLUMNS, import_attendance),
+    'STUDENTS': (STUDENT_COLUMNS, import_students),
+}
+
+
+def import_sheet(kind, file_obj, user, progress=None):
+    """
+    Stream an uploaded sheet (.xlsx or .csv) into the importer for `kind`.
+    Only one batch of rows is held in memory at a time.
+    `progress(result, total_rows)` is called after every batch.
+    """
+    columns, importer = SHEET_IMPORTERS[kind]
+    with SheetReader(file_obj, columns) as sheet:
+        report = (lambda result: progress(result, sheet.total_rows)) if progress else None
+        return importer(sheet, user, progress=report)
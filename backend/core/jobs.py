@@ -0,0 +1,207 @@
+"""
+Background spreadsheet imports.
+
+Uploads are stored as ImportJob rows (the queue lives in the database, no
+broker needed). Jobs are picked up by a small in-process thread pool, or by
+`python manage.py run_import_jobs` when IMPORT_JOB_WORKERS is 0. A job is
+claimed with a conditional UPDATE, so several processes can share the queue
+without running a job twice.
+
+Web workers die with their jobs (gunicorn recycles them after max_requests
+and kills them on timeout). A running job therefore holds a lease: its
+worker renews heartbeat_at every IMPORT_JOB_LEASE / 3 seconds, and once
+the lease has run out the job can be claimed again. Each process with a
+pool also sweeps the queue every IMPORT_JOB_POLL seconds (start_sweeper(),
+called when a gunicorn worker starts), so jobs left behind by a dead worker
+are picked up without anyone running `run_import_jobs`. A job is given up
+after IMPORT_JOB_MAX_ATTEMPTS claims.
+"""
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .importers import MissingColumnError, NotAssignedError, import_sheet
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+_queued = set()  # job ids submitted to this process's pool and not finished yet
+_sweeper = None
+
+
+def progress_key(job_id):
+    return f"import-job:{job_id}:progress"
+
+
+def enqueue_import(kind, file_obj, user):
+    job = ImportJob.objects.create(kind=kind, file=file_obj, created_by=user)
+    # Only hand the job to a worker once the row is visible to other connections
+    transaction.on_commit(lambda: submit(job.pk))
+    return job
+
+
+def submit(job_id):
+    workers = getattr(settings, 'IMPORT_JOB_WORKERS', 0)
+    if not workers:
+        return  # left for `manage.py run_import_jobs`
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-job')
+        if job_id in _queued:
+            return
+        _queued.add(job_id)
+    _pool.submit(_run_queued, job_id)
+
+
+def _run_queued(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        with _pool_lock:
+            _queued.discard(job_id)
+
+
+def claimable():
+    """Queued jobs, and running ones whose worker stopped renewing the lease, oldest first."""
+    expired = timezone.now() - datetime.timedelta(seconds=settings.IMPORT_JOB_LEASE)
+    return ImportJob.objects.filter(
+        Q(status='PENDING') | Q(status='RUNNING', heartbeat_at__lt=expired)
+    ).order_by('created_at')
+
+
+def claim(job_id):
+    now = timezone.now()
+    return claimable().filter(pk=job_id).update(
+        status='RUNNING', started_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+    ) == 1
+
+
+def _renew(job_id, stop):
+    # Own connection: the import's transaction must not hold the heartbeat back
+    interval = settings.IMPORT_JOB_LEASE / 3
+    try:
+        while not stop.wait(interval):
+            try:
+                ImportJob.objects.filter(pk=job_id, status='RUNNING').update(heartbeat_at=timezone.now())
+            except Exception:
+                logger.exception("Could not renew the lease of import job %s", job_id)
+    finally:
+        connection.close()
+
+
+def run_job(job_id):
+    """Claim and run one job. Returns False if another worker got it first."""
+    try:
+        if not claim(job_id):
+            return False
+        job = ImportJob.objects.select_related('created_by').get(pk=job_id)
+        if job.attempts > settings.IMPORT_JOB_MAX_ATTEMPTS:
+            _finish(job, 'FAILED', message=(
+                f"Gave up after {settings.IMPORT_JOB_MAX_ATTEMPTS} attempts; "
+                "the worker running it stopped each time."
+            ))
+            return True
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_renew, args=(job_id, stop), daemon=True)
+        heartbeat.start()
+        try:
+            _execute(job)
+        finally:
+            stop.set()
+            heartbeat.join()
+        return True
+    finally:
+        # Worker threads own their connections; don't leak them
+        close_old_connections()
+
+
+def run_pending(limit=None):
+    """Run claimable jobs in this thread, oldest first. Used by the worker command and tests."""
+    ids = list(claimable().values_list('id', flat=True)[:limit])
+    return sum(1 for job_id in ids if run_job(job_id))
+
+
+def _sweep():
+    while True:
+        try:
+            for job_id in claimable().values_list('id', flat=True)[:settings.IMPORT_JOB_WORKERS]:
+                submit(job_id)
+        except Exception:
+            logger.exception("Import job sweep failed")
+        finally:
+            close_old_connections()
+        time.sleep(settings.IMPORT_JOB_POLL)
+
+
+def start_sweeper():
+    """Pick up queued and abandoned jobs in this process from now on (gunicorn's post_worker_init)."""
+    global _sweeper
+    if not settings.IMPORT_JOB_WORKERS or _sweeper is not None:
+        return
+    _sweeper = threading.Thread(target=_sweep, name='import-job-sweeper', daemon=True)
+    _sweeper.start()
+
+
+def _report(job_id, result, total_rows):
+    # The import runs in one transaction, so progress written to the job row
+    # would stay invisible until the end. Pollers read it from the cache instead.
+    cache.set(progress_key(job_id), {
+        "total_rows": total_rows,
+        "processed": result.processed,
+        "skipped": result.skipped,
+    }, timeout=60 * 60)
+
+
+def _execute(job):
+    try:
+        with job.file.open('rb') as file_obj:
+            result = import_sheet(
+                job.kind, file_obj, job.created_by,
+                progress=lambda result, total_rows: _report(job.pk, result, total_rows),
+            )
+    except MissingColumnError as e:
+        _finish(job, 'FAILED', message=f"Missing required column: {e}")
+    except NotAssignedError as e:
+        _finish(job, 'FAILED', message=f"Security Alert: You are not assigned to teach '{e.course_name}'.")
+    except Exception as e:
+        logger.exception("Import job %s failed", job.pk)
+        _finish(job, 'FAILED', message=str(e))
+    else:
+        summary = {k: v for k, v in result.as_dict().items() if k not in ('processed', 'skipped', 'errors')}
+        summary.update({k: getattr(result, k) for k in ('created', 'updated') if hasattr(result, k)})
+        _finish(
+            job, 'DONE', total_rows=result.processed + result.skipped,
+            processed=result.processed, skipped=result.skipped,
+            errors=result.errors, result=summary,
+        )
+        # The sheet is no longer needed once its rows are in the database
+        job.file.delete(save=False)
+        ImportJob.objects.filter(pk=job.pk).update(file='')
+    finally:
+        cache.delete(progress_key(job.pk))
+
+
+def _finish(job, status, **fields):
+    ImportJob.objects.filter(pk=job.pk).update(status=status, finished_at=timezone.now(), **fields)
+
+
+def job_progress(job):
+    """Live counters for a running job, falling back to the stored row."""
+    if job.status == 'RUNNING':
+        live = cache.get(progress_key(job.pk))
+        if live:
+            return live
+    return {"total_rows": job.total_rows, "processed": job.processed, "skipped": job.skipped}
@@ -0,0 +1,78 @@
+import datetime
+import json
+import subprocess
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.benchmarks import run_benchmarks
+from core.synthetic import seed_university
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch test database with a synthetic university and time the hot paths "
+        "(uploads, get_courses, ManageGradesView, list_students, admin changelists). "
+        "The configured database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per case.")
+        parser.add_argument('--upload-rows', type=int, default=2000, help="Rows in the grade and attendance sheets.")
+        parser.add_argument('--student-rows', type=int, default=20,
+                            help="New students per student upload (each one's password is hashed).")
+        parser.add_argument('--only', nargs='*', help="Run only the cases whose name contains one of these words.")
+        parser.add_argument('--json', help="Write the results to this file.")
+        parser.add_argument('--compare', help="Results file of an earlier run to compare against.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as fh:
+                    baseline = json.load(fh)['results']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Can't read {options['compare']}: {e}")
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            start = time.perf_counter()
+            counts = seed_university(students=options['students'])
+            self.stdout.write(f"Seeded {counts} in {time.perf_counter() - start:.1f}s")
+            results = run_benchmarks(options['repeat'], options['upload_rows'], options['student_rows'], options['only'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.report(results, baseline)
+        if options['json']:
+            with open(options['json'], 'w') as fh:
+                json.dump({
+                    'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                    'revision': git_revision(),
+                    'vendor': connection.vendor,
+                    'django': django.get_version(),
+                    'seed': counts,
+                    'options': {k: options[k] for k in ('students', 'repeat', 'upload_rows', 'student_rows')},
+                    'results': results,
+                }, fh, indent=2)
+
+    def report(self, results, baseline=None):
+        self.stdout.write(f"\n{'case':<45} {'median ms':>10} {'p95 ms':>10} {'queries':>8} {'status':>6}"
+                          + (f" {'vs before':>10}" if baseline else ""))
+        for name, r in results.items():
+            line = f"{name:<45} {r['ms']['median']:>10} {r['ms']['p95']:>10} {r['queries']:>8} {r['status']:>6}"
+            if baseline and name in baseline:
+                before = baseline[name]['ms']['median']
+                line += f" {(r['ms']['median'] - before) / before * 100:>+9.1f}%" if before else ""
+            self.stdout.write(line)
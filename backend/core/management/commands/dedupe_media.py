@@ -0,0 +1,33 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Certificate, Material
+from core.storage import PREFIX
+
+
+class Command(BaseCommand):
+    help = "Move materials and certificates saved before the content-addressed storage into it, sharing identical files."
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+        for model in (Material, Certificate):
+            for obj in model.objects.exclude(file='').exclude(file__startswith=PREFIX).iterator():
+                storage = obj.file.storage
+                old_name = obj.file.name
+                if not storage.exists(old_name):
+                    missing += 1
+                    self.stderr.write(f"{model.__name__} #{obj.pk}: {old_name} is missing")
+                    continue
+
+                # 1. Store a copy (or take a reference to identical content)
+                with storage.open(old_name) as fh:
+                    new_name = storage.save(os.path.basename(old_name), fh)
+                # 2. Point the record at it without signals, then drop the old file
+                with transaction.atomic():
+                    model.objects.filter(pk=obj.pk).update(file=new_name)
+                storage.delete(old_name)
+                moved += 1
+
+        self.stdout.write(f"Moved {moved} file(s) into the store ({missing} missing).")
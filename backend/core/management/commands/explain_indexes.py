@@ -0,0 +1,97 @@
+import datetime
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from core.models import Attendance, Course, Exam, Grade, Material
+from core.synthetic import seed_university
+from users.models import User
+
+# Schema as it was before the unique keys (core 0007/0008) and hot-lookup indexes (0010)
+BEFORE = [
+    ('core', '0006_academicyear_level_alter_news_options_and_more'),
+    ('users', '0002_user_department_user_level_alter_user_role'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch test database and print the query plans and timings of the hot "
+        "Grade/Attendance/Exam/Material/User lookups before and after the index migrations. "
+        "The configured database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20, help="Runs per query when timing.")
+        parser.add_argument('--json', help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.migrate(BEFORE)
+            # The transcripts table comes after BEFORE
+            counts = seed_university(students=options['students'], transcripts=False)
+            self.stdout.write(f"Seeded: {counts}")
+            before = self.measure(options['repeat'])
+
+            self.migrate(None)
+            after = self.measure(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.report(before, after)
+        if options['json']:
+            with open(options['json'], 'w') as fh:
+                json.dump({'vendor': connection.vendor, 'seed': counts, 'before': before, 'after': after}, fh, indent=2)
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets or executor.loader.graph.leaf_nodes())
+        if connection.vendor == 'sqlite':
+            # Give the planner fresh statistics for the new indexes
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def hot_queries(self):
+        grade = Grade.objects.order_by('id').first()
+        student = grade.student
+        cohort_courses = list(
+            Course.objects.filter(department_id=student.department_id, level_id=student.level_id)
+            .values_list('id', flat=True)
+        )
+        return {
+            'grade by (student, course)': Grade.objects.filter(student_id=student.id, course_id=grade.course_id),
+            'attendance by (student, course)': Attendance.objects.filter(student_id=student.id, course_id=grade.course_id),
+            'grades of a course': Grade.objects.filter(course_id=grade.course_id).order_by('id'),
+            'upcoming exams of a cohort': Exam.objects.filter(
+                course_id__in=cohort_courses, date__gte=datetime.date.today()
+            ).order_by('date', 'time'),
+            'course materials, newest first': Material.objects.filter(course_id=grade.course_id).order_by('-uploaded_at'),
+            'students of a cohort': User.objects.filter(
+                role='STUDENT', department_id=student.department_id, level_id=student.level_id
+            ),
+        }
+
+    def measure(self, repeat):
+        results = {}
+        for label, queryset in self.hot_queries().items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            results[label] = {
+                'ms': round((time.perf_counter() - start) * 1000 / repeat, 3),
+                'plan': queryset.explain(),
+            }
+        return results
+
+    def report(self, before, after):
+        for label in before:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+            for name, run in (('before', before[label]), ('after', after[label])):
+                plan = run['plan'].replace('\n', '\n' + ' ' * 10)
+                self.stdout.write(f"  {name:<7} {run['ms']:>8} ms  {plan}")
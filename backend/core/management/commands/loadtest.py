@@ -0,0 +1,174 @@
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+
+DASHBOARD_PATHS = '/api/courses/,/api/my-grades/,/api/my-attendance/,/api/student/exams/,/api/news/'
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_load(base_url, paths, headers, concurrency, duration):
+    """
+    Hit `paths` round-robin from `concurrency` keep-alive clients for `duration`
+    seconds. Returns throughput and latency percentiles (ms).
+    """
+    target = urlsplit(base_url)
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client(offset):
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        mine, failed, i = [], 0, offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                continue
+            mine.append((time.perf_counter() - start) * 1000)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the student dashboard endpoints with concurrent keep-alive clients. "
+        "Either points at a running server (--base-url), or starts gunicorn once per "
+        "--spawn-workers value to show how throughput scales with worker processes. "
+        "--app bsu_portal.wsgi,bsu_portal.asgi compares the sync views with their async "
+        "versions, e.g. at --concurrency 500."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="Student whose token the clients use.")
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--paths', default=DASHBOARD_PATHS, help="Comma-separated paths, requested round-robin.")
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=15, help="Seconds per run.")
+        parser.add_argument('--warmup', type=float, default=2, help="Seconds of unmeasured load before each run.")
+        parser.add_argument('--spawn-workers', help="e.g. 1,2,4: start gunicorn with each worker count in turn.")
+        parser.add_argument('--app', default='bsu_portal.wsgi',
+                            help="Comma-separated modules for gunicorn to serve. bsu_portal.asgi runs "
+                                 "with uvicorn workers and the async student views.")
+        parser.add_argument('--port', type=int, default=8765, help="Port for the spawned servers.")
+        parser.add_argument('--json', help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            student = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user '{options['username']}'.")
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(student).access_token}'}
+        paths = [p.strip() for p in options['paths'].split(',') if p.strip()]
+
+        runs = []
+        if options['spawn_workers']:
+            base_url = f"http://127.0.0.1:{options['port']}"
+            for app in options['app'].split(','):
+                for workers in [int(w) for w in options['spawn_workers'].split(',')]:
+                    server = self.spawn(app, workers, options['port'])
+                    try:
+                        self.wait_until_up(base_url, paths[0], headers)
+                        runs.append({'app': app, 'workers': workers,
+                                     **self.measure(base_url, paths, headers, options)})
+                    finally:
+                        server.terminate()
+                        server.wait(timeout=60)
+        else:
+            runs.append({'app': options['base_url'], 'workers': None,
+                         **self.measure(options['base_url'], paths, headers, options)})
+
+        self.report(runs)
+        if options['json']:
+            with open(options['json'], 'w') as fh:
+                json.dump({
+                    'paths': paths, 'concurrency': options['concurrency'],
+                    'duration': options['duration'], 'cpu_count': os.cpu_count(), 'runs': runs,
+                }, fh, indent=2)
+
+    def measure(self, base_url, paths, headers, options):
+        if options['warmup']:
+            run_load(base_url, paths, headers, options['concurrency'], options['warmup'])
+        return run_load(base_url, paths, headers, options['concurrency'], options['duration'])
+
+    def spawn(self, app, workers, port):
+        env = dict(os.environ, GUNICORN_WORKERS=str(workers), GUNICORN_BIND=f'127.0.0.1:{port}',
+                   GUNICORN_ACCESS_LOG='', GUNICORN_LOG_LEVEL='warning')
+        if app.endswith('asgi'):
+            env['GUNICORN_WORKER_CLASS'] = 'uvicorn.workers.UvicornWorker'
+            env['ASYNC_STUDENT_VIEWS'] = '1'
+            # Async views don't reuse persistent connections (see settings)
+            env['DB_CONN_MAX_AGE'] = '0'
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', app, '-c', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=env,
+        )
+
+    def wait_until_up(self, base_url, path, headers, timeout=30):
+        target = urlsplit(base_url)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                conn = http.client.HTTPConnection(target.hostname, target.port, timeout=2)
+                conn.request('GET', path, headers=headers)
+                conn.getresponse().read()
+                conn.close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server at {base_url} did not come up within {timeout}s.")
+
+    def report(self, runs):
+        self.stdout.write(f"{'app':<22} {'workers':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for run in runs:
+            workers = run['workers'] if run['workers'] is not None else '-'
+            self.stdout.write(
+                f"{run['app']:<22} {workers:>8} {run['rps']:>9} {run['p50_ms']:>8} {run['p95_ms']:>8} {run['p99_ms']:>8} {run['errors']:>7}"
+            )
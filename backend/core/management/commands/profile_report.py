@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the sampled request profiles (PROFILING_SAMPLE_RATE) per endpoint, slowest first. "
+        "Sees the web workers' data when they share the cache (CACHE_BACKEND)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help="Endpoints to show.")
+        parser.add_argument('--queries', type=int, default=3, help="Slowest statements to show per endpoint.")
+        parser.add_argument('--json', action='store_true', help="Print the full report as JSON.")
+        parser.add_argument('--reset', action='store_true', help="Clear the collected samples afterwards.")
+
+    def handle(self, *args, **options):
+        report = profiling.report(profiling.collect())
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        elif not report['endpoints']:
+            self.stdout.write("No samples yet (is PROFILING_SAMPLE_RATE set on the web workers?).")
+        else:
+            self.stdout.write(f"{report['workers']} worker(s)\n")
+            self.stdout.write(
+                f"{'endpoint':<40} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+                f"{'queries':>8} {'max q':>6} {'db ms':>8} {'serial':>8} {'render':>8}"
+            )
+            for e in report['endpoints'][:options['limit']]:
+                t = e['total_ms']
+                self.stdout.write(
+                    f"{e['name'][:40]:<40} {e['samples']:>6} {t['p50']:>8.1f} {t['p95']:>8.1f} {t['max']:>8.1f} "
+                    f"{e['queries']['mean']:>8} {e['queries']['max']:>6} "
+                    f"{e['db_ms']:>8} {e['serialize_ms']:>8} {e['render_ms']:>8}"
+                )
+                for q in e['slowest_queries'][:options['queries']]:
+                    self.stdout.write(f"    {q['ms']:>8.2f} ms  {q['sql'][:120]}")
+
+        if options['reset']:
+            profiling.reset()
+            self.stdout.write("Samples cleared.")
@@ -0,0 +1,23 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.storage import content_storage
+from core.uploads import purge_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete chunked uploads (and their part files) that have not received a chunk for a while, "
+        "and temporary files of stored uploads whose transaction rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=48, help="Idle time after which an upload is abandoned.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(hours=options['hours'])
+        self.stdout.write(f"Purged {purge_stale(cutoff)} abandoned upload(s).")
+        purged = content_storage.purge_temporary(cutoff.timestamp())
+        self.stdout.write(f"Purged {purged} temporary file(s).")
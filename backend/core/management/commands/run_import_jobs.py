@@ -0,0 +1,33 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import claimable, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued spreadsheet uploads (ImportJob rows) with a local worker pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Jobs processed in parallel.")
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit.")
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        self.stdout.write(f"Import worker started with {workers} thread(s).")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-job') as pool:
+            while True:
+                # Queued jobs, and those whose worker died (lease expired)
+                pending = list(claimable().values_list('id', flat=True)[:workers])
+                # run_job claims each job first, so other workers can poll the same queue
+                done = sum(pool.map(run_job, pending))
+                if done:
+                    self.stdout.write(f"Processed {done} job(s).")
+
+                if options['once'] and not pending:
+                    break
+                if not pending:
+                    time.sleep(options['poll'])
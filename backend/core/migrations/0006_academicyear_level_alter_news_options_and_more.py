@@ -0,0 +1,128 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_material'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AcademicYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.CharField(max_length=20, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Level',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='news',
+            options={},
+        ),
+        migrations.RemoveField(
+            model_name='attendance',
+            name='date',
+        ),
+        migrations.RemoveField(
+            model_name='attendance',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='course',
+            name='doctor',
+        ),
+        migrations.RemoveField(
+            model_name='news',
+            name='image_url',
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='attended_lectures',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='total_lectures',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='semester',
+            field=models.CharField(choices=[('1', 'First Semester'), ('2', 'Second Semester'), ('Summer', 'Summer Semester')], default='1', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='material',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.course'),
+        ),
+        migrations.CreateModel(
+            name='Certificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='certificates/')),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='certificate', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DeletionRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('YEAR', 'Academic Year'), ('LEVEL', 'Level')], max_length=10)),
+                ('target_id', models.IntegerField()),
+                ('target_name', models.CharField(max_length=100)),
+                ('is_approved', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('requester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Exam',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam_type', models.CharField(choices=[('Midterm', 'Midterm'), ('Final', 'Final'), ('Quiz', 'Quiz')], default='Midterm', max_length=10)),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('duration_minutes', models.IntegerField(default=90)),
+                ('location', models.CharField(max_length=100)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exams', to='core.course')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='level',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='courses', to='core.level'),
+        ),
+        migrations.CreateModel(
+            name='TeachingAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.CharField(choices=[('1', 'First Semester'), ('2', 'Second Semester'), ('Summer', 'Summer Semester')], max_length=10)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.academicyear')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.course')),
+                ('doctor', models.ForeignKey(limit_choices_to={'role': 'DOCTOR'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.level')),
+            ],
+            options={
+                'unique_together': {('doctor', 'course', 'academic_year', 'level', 'semester')},
+            },
+        ),
+    ]
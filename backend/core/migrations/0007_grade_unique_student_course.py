@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def remove_duplicate_grades(apps, schema_editor):
+    # Older uploads could create the same (student, course) twice.
+    # Keep the newest row so the unique constraint can be added.
+    Grade = apps.get_model('core', 'Grade')
+    duplicates = (
+        Grade.objects.values('student_id', 'course_id')
+        .annotate(rows=Count('id'), keep_id=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        Grade.objects.filter(
+            student_id=dup['student_id'], course_id=dup['course_id']
+        ).exclude(id=dup['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_academicyear_level_alter_news_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_grades, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='grade',
+            unique_together={('student', 'course')},
+        ),
+    ]
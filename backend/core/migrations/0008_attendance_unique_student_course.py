@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:56
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def remove_duplicate_attendance(apps, schema_editor):
+    # Keep the newest summary per (student, course) before adding the constraint
+    Attendance = apps.get_model('core', 'Attendance')
+    duplicates = (
+        Attendance.objects.values('student_id', 'course_id')
+        .annotate(rows=Count('id'), keep_id=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        Attendance.objects.filter(
+            student_id=dup['student_id'], course_id=dup['course_id']
+        ).exclude(id=dup['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_grade_unique_student_course'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='attendance',
+            unique_together={('student', 'course')},
+        ),
+    ]
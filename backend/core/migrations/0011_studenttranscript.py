@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_transcripts(apps, schema_editor):
+    # Existing grades get their transcripts once; signals and the importers keep them current after this
+    from core.transcripts import summarize
+
+    Grade = apps.get_model('core', 'Grade')
+    StudentTranscript = apps.get_model('core', 'StudentTranscript')
+    rows = Grade.objects.values_list('student_id', 'score', 'semester', 'course__credit_hours').iterator()
+    StudentTranscript.objects.bulk_create(
+        [StudentTranscript(student_id=pk, **fields) for pk, fields in summarize(rows).items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_hot_lookup_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentTranscript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gpa', models.FloatField(blank=True, null=True)),
+                ('total_credits', models.IntegerField(default=0)),
+                ('earned_credits', models.IntegerField(default=0)),
+                ('graded_courses', models.IntegerField(default=0)),
+                ('semesters', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='transcript', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-gpa'], name='transcript_gpa_idx')],
+            },
+        ),
+        migrations.RunPython(build_transcripts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:24
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refs', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='file',
+            field=models.FileField(max_length=255, storage=core.storage.ContentAddressedStorage(), upload_to='certificates/'),
+        ),
+        migrations.AlterField(
+            model_name='material',
+            name='file',
+            field=models.FileField(max_length=255, storage=core.storage.ContentAddressedStorage(), upload_to='materials/'),
+        ),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import connections, models, router
 from django.conf import settings
 
+from .storage import content_storage
+
 # 1. Department (e.g., Electrical, Civil)
 class Department(models.Model):
     name = models.CharField(max_length=100)
@@ -59,20 +61,52 @@ class Grade(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     score = models.FloatField(null=True, blank=True) # Allow empty grades initially
     semester = models.CharField(max_length=20)
+
+    class Meta:
+        # One grade per student per course; bulk uploads upsert on this key
+        unique_together = ('student', 'course')
     
+    # Grade points per letter, for GPAs (see core.transcripts)
+    GRADE_POINTS = {'A': 4.0, 'A-': 3.7, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0}
+
+    @staticmethod
+    def letter_for(score):
+        if score is None: return 'N/A'
+        if score >= 90: return 'A'
+        elif score >= 85: return 'A-'
+        elif score >= 75: return 'B'
+        elif score >= 65: return 'C'
+        elif score >= 50: return 'D'
+        return 'F'
+
     @property
     def letter_grade(self):
-        if self.score is None: return 'N/A'
-        if self.score >= 90: return 'A'
-        elif self.score >= 85: return 'A-'
-        elif self.score >= 75: return 'B'
-        elif self.score >= 65: return 'C'
-        elif self.score >= 50: return 'D'
-        return 'F'
+        return self.letter_for(self.score)
 
     def __str__(self):
         return f"{self.student} - {self.course}: {self.score}"
 
+class StudentTranscript(models.Model):
+    """
+    Materialized GPA and credit totals of one student, kept up to date by
+    core.transcripts whenever their grades change.
+    """
+    student = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='transcript')
+    gpa = models.FloatField(null=True, blank=True)  # None until a course is graded
+    total_credits = models.IntegerField(default=0)  # credit hours of graded courses
+    earned_credits = models.IntegerField(default=0)  # ... of those passed
+    graded_courses = models.IntegerField(default=0)
+    # [{"semester": "1", "gpa": 3.2, "credits": 9, "earned_credits": 9, "courses": 3}, ...]
+    semesters = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Rankings read transcripts best first
+        indexes = [models.Index(fields=['-gpa'], name='transcript_gpa_idx')]
+
+    def __str__(self):
+        return f"{self.student}: GPA {self.gpa}"
+
 class Attendance(models.Model):
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='attendance')
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -81,6 +115,10 @@ class Attendance(models.Model):
     attended_lectures = models.IntegerField(default=0)
     total_lectures = models.IntegerField(default=0)
 
+    class Meta:
+        # One attendance summary per student per course (upsert key)
+        unique_together = ('student', 'course')
+
     @property
     def percentage(self):
         if self.total_lectures == 0: return 0
@@ -92,9 +130,13 @@ class Attendance(models.Model):
 class Material(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
-    file = models.FileField(upload_to='materials/')
+    file = models.FileField(upload_to='materials/', storage=content_storage, max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Course material listings, newest first
+        indexes = [models.Index(fields=['course', 'uploaded_at'], name='material_course_uploaded_idx')]
+
 # --- NEW MODEL: News/Events (Keep this if you had it) ---
 class News(models.Model):
     title = models.CharField(max_length=200)
@@ -136,7 +178,7 @@ class TeachingAssignment(models.Model):
 
 class Certificate(models.Model):
     student = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='certificate')
-    file = models.FileField(upload_to='certificates/')
+    file = models.FileField(upload_to='certificates/', storage=content_storage, max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -154,5 +196,103 @@ class Exam(models.Model):
     duration_minutes = models.IntegerField(default=90) # 1.5 Hours default
     location = models.CharField(max_length=100) # e.g. "Hall 3, Building B"
 
+    class Meta:
+        # "Next exam per course" and exam schedules are filtered by course, ordered by date/time
+        indexes = [models.Index(fields=['course', 'date', 'time'], name='exam_course_date_time_idx')]
+
     def __str__(self):
-        return f"{self.course.code} {self.exam_type} - {self.date}"
\ No newline at end of file
+        return f"{self.course.code} {self.exam_type} - {self.date}"
+
+class ImportJob(models.Model):
+    KIND_CHOICES = (
+        ('GRADES', 'Grades'),
+        ('ATTENDANCE', 'Attendance'),
+        ('STUDENTS', 'Students'),
+    )
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    file = models.FileField(upload_to='imports/')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='import_jobs')
+
+    # Filled in by the worker (live progress is kept in the cache while RUNNING)
+    total_rows = models.IntegerField(null=True, blank=True)
+    processed = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Renewed by the worker while RUNNING; a job whose lease ran out is claimed again (core.jobs)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.kind} import #{self.pk} ({self.status})"
+
+
+class UploadSession(models.Model):
+    """
+    A chunked, resumable Material upload (core.uploads). Chunks are appended
+    to a part file on disk; `received` is how far it got, so an interrupted
+    upload resumes from there.
+    """
+    STATUS_CHOICES = (
+        ('OPEN', 'Open'),
+        ('COMPLETE', 'Complete'),
+    )
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    title = models.CharField(max_length=200)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)  # expected digest of the whole file
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
+    material = models.ForeignKey(Material, on_delete=models.SET_NULL, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload #{self.pk} {self.filename} ({self.received}/{self.size})"
+
+
+class Blob(models.Model):
+    """
+    One stored file of core.storage, shared by every Material/Certificate
+    with the same content. `refs` counts them; the file goes with the last.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    refs = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.refs} refs)"
+
+
+def upsert(model, objs, unique_fields, update_fields):
+    """
+    bulk_create() that updates rows clashing on `unique_fields`. MySQL can't
+    name the conflict target; its ON DUPLICATE KEY UPDATE fires on any unique
+    key, which for the tables upserted here is that same one.
+    """
+    if not connections[router.db_for_write(model)].features.supports_update_conflicts_with_target:
+        unique_fields = None
+    return model.objects.bulk_create(
+        objs, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields
+    )
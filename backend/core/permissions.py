@@ -0,0 +1,63 @@
+"""
+Course ownership checks for doctors.
+
+A doctor may only manage courses they are assigned to through
+TeachingAssignment. Their assigned course ids are loaded with one query,
+kept on the user object for the rest of the request and in the cache for
+ASSIGNMENT_CACHE_TTL seconds. Signals drop the cached set whenever one of
+the doctor's assignments changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.permissions import BasePermission
+
+from .models import TeachingAssignment
+
+
+def _cache_key(user_id):
+    return f"auth:assigned-courses:{user_id}"
+
+
+def assigned_course_ids(user):
+    """Frozenset of course ids the doctor teaches (at most one query per request)."""
+    memo = getattr(user, '_assigned_course_ids', None)
+    if memo is not None:
+        return memo
+
+    key = _cache_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(
+            TeachingAssignment.objects.filter(doctor_id=user.pk).values_list('course_id', flat=True)
+        )
+        cache.set(key, ids, settings.ASSIGNMENT_CACHE_TTL)
+
+    user._assigned_course_ids = ids
+    return ids
+
+
+def is_assigned(user, course_id):
+    # Only doctors are restricted; staff and admins manage every course
+    if user.role != 'DOCTOR':
+        return True
+    return course_id in assigned_course_ids(user)
+
+
+def forget_assignments(doctor_id):
+    key = _cache_key(doctor_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class IsAssignedToCourse(BasePermission):
+    """
+    Object permission for anything with a course: a Course, or a model with a
+    `course_id` (Material, Exam, Grade, Attendance ...).
+    """
+    message = "You are not assigned to teach this course."
+
+    def has_object_permission(self, request, view, obj):
+        course_id = getattr(obj, 'course_id', None)
+        if course_id is None:
+            course_id = obj.pk
+        return is_assigned(request.user, course_id)
@@ -0,0 +1,295 @@
+"""
+Sampled request profiling, aggregated per URL name.
+
+With PROFILING_SAMPLE_RATE > 0, that fraction of requests is timed by
+ProfilingMiddleware: total time, number of SQL queries and their time (on
+every database alias), the time spent evaluating serializers' .data (the
+queries it triggers count as DB time as well), the time spent rendering the
+response (DRF's JSON rendering) and the slowest statements. Unsampled
+requests only pay for one random() call.
+
+Samples go into a ring buffer per URL name in each worker process
+(PROFILING_BUFFER_SIZE most recent). Every PROFILING_PUBLISH_INTERVAL
+seconds a worker copies its buffers to one of MAX_WORKERS slots in the
+cache, taken with cache.add() so concurrent workers never overwrite each
+other. The report (/api/profiling/ for admins, `manage.py profile_report`)
+reads all slots and covers every worker when the cache is shared between
+them (see CACHES in settings).
+Streaming responses are timed until the response starts, not to the end.
+"""
+import contextvars
+import heapq
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+# Statements kept per request and per URL name
+SLOWEST = 5
+SQL_LENGTH = 500
+# Published buffers of a worker that stopped (e.g. recycled by max_requests) expire after this
+WORKER_TTL = 3600
+# Slots for published buffers; workers beyond this many are left out of the report
+MAX_WORKERS = 64
+
+GENERATION_KEY = 'profiling:generation'
+
+_lock = threading.Lock()
+_samples = {}  # url name -> deque of (total_ms, db_ms, serialize_ms, render_ms, queries)
+_slowest = {}  # url name -> heap of (ms, sql)
+_state = {'published': 0.0, 'generation': None, 'slot': None, 'patched': False}
+_current = contextvars.ContextVar('profile', default=None)
+
+
+def _slot_key(slot):
+    return f'profiling:worker:{slot}'
+
+
+class QueryTimer:
+    """A connection.execute_wrapper() counting and timing queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.time += elapsed
+            _keep_slowest(self.slowest, elapsed, sql)
+
+
+def _keep_slowest(heap, ms, sql):
+    if len(heap) < SLOWEST:
+        heapq.heappush(heap, (ms, sql[:SQL_LENGTH]))
+    elif ms > heap[0][0]:
+        heapq.heapreplace(heap, (ms, sql[:SQL_LENGTH]))
+
+
+class _Profile:
+    def __init__(self):
+        self.timer = QueryTimer()
+        self.render_started = None
+        self.serialize_time = 0.0
+        self.serializing = False
+        self._wrappers = []
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self._token = _current.set(self)
+        for conn in connections.all():
+            wrapper = conn.execute_wrapper(self.timer)
+            wrapper.__enter__()
+            self._wrappers.append(wrapper)
+        return self
+
+    def __exit__(self, *exc):
+        for wrapper in reversed(self._wrappers):
+            wrapper.__exit__(*exc)
+        _current.reset(self._token)
+        self.end = time.perf_counter()
+
+    def sample(self):
+        total = (self.end - self.start) * 1000
+        render = (self.end - self.render_started) * 1000 if self.render_started else 0.0
+        return (
+            round(total, 2), round(self.timer.time, 2), round(self.serialize_time, 2),
+            round(render, 2), self.timer.count,
+        )
+
+
+def _timed(data):
+    def timed_data(serializer):
+        profile = _current.get()
+        # Nested .data calls (e.g. from a SerializerMethodField) are part of the outer one
+        if profile is None or profile.serializing:
+            return data.fget(serializer)
+        profile.serializing = True
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serialize_time += (time.perf_counter() - start) * 1000
+            profile.serializing = False
+    return property(timed_data)
+
+
+def _time_serializers():
+    # Serializer.data and ListSerializer.data both evaluate the fields in BaseSerializer.data
+    if not _state['patched']:
+        BaseSerializer.data = _timed(BaseSerializer.data)
+        _state['patched'] = True
+
+
+def record(name, sample, statements=()):
+    with _lock:
+        _samples.setdefault(name, deque(maxlen=settings.PROFILING_BUFFER_SIZE)).append(sample)
+        heap = _slowest.setdefault(name, [])
+        for ms, sql in statements:
+            _keep_slowest(heap, ms, sql)
+    if time.monotonic() - _state['published'] >= settings.PROFILING_PUBLISH_INTERVAL:
+        publish()
+
+
+def _snapshot():
+    with _lock:
+        return {
+            name: {'samples': list(samples), 'slowest': sorted(_slowest.get(name, []), reverse=True)}
+            for name, samples in _samples.items()
+        }
+
+
+def _clear_local():
+    with _lock:
+        _samples.clear()
+        _slowest.clear()
+
+
+def publish():
+    """Copy this worker's buffers to the cache (dropping them first if the report was reset)."""
+    _state['published'] = time.monotonic()
+    generation = cache.get(GENERATION_KEY)
+    if generation != _state['generation']:
+        if _state['generation'] is not None:
+            _clear_local()
+        _state['generation'] = generation
+
+    pid = os.getpid()
+    slot = _state['slot']
+    # 1. The slot expired or was cleared by a reset (or was inherited over a fork): take a free one
+    if slot is None or (cache.get(_slot_key(slot)) or {}).get('pid') != pid:
+        slot = _state['slot'] = _claim_slot(pid)
+        if slot is None:
+            return
+    cache.set(_slot_key(slot), {'pid': pid, 'endpoints': _snapshot()}, WORKER_TTL)
+
+
+def _claim_slot(pid):
+    for slot in range(MAX_WORKERS):
+        if cache.add(_slot_key(slot), {'pid': pid, 'endpoints': {}}, WORKER_TTL):
+            return slot
+    return None
+
+
+def _all_slots():
+    return [_slot_key(slot) for slot in range(MAX_WORKERS)]
+
+
+def collect():
+    """Published buffers of every worker: {pid: {url name: {'samples', 'slowest'}}}."""
+    return {entry['pid']: entry['endpoints'] for entry in cache.get_many(_all_slots()).values()}
+
+
+def reset():
+    _clear_local()
+    cache.delete_many(_all_slots())
+    _state['slot'] = None
+    # Other workers drop their buffers on their next publish
+    _state['generation'] = os.urandom(6).hex()
+    cache.set(GENERATION_KEY, _state['generation'], None)
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else None
+
+
+def _mean(values):
+    return round(sum(values) / len(values), 2) if values else None
+
+
+def report(snapshots):
+    """Per URL name statistics over the workers' buffers, slowest (p95) first."""
+    merged = {}
+    for snapshot in snapshots.values():
+        for name, data in snapshot.items():
+            entry = merged.setdefault(name, {'samples': [], 'slowest': []})
+            entry['samples'].extend(data['samples'])
+            entry['slowest'].extend(data['slowest'])
+
+    endpoints = []
+    for name, data in merged.items():
+        totals, db, serialize, render, queries = (list(column) for column in zip(*data['samples']))
+        totals.sort()
+        endpoints.append({
+            'name': name,
+            'samples': len(totals),
+            'total_ms': {'p50': _percentile(totals, 50), 'p95': _percentile(totals, 95), 'max': totals[-1]},
+            'db_ms': _mean(db),
+            'serialize_ms': _mean(serialize),
+            'render_ms': _mean(render),
+            'queries': {'mean': _mean(queries), 'max': max(queries)},
+            'slowest_queries': [
+                {'ms': round(ms, 2), 'sql': sql} for ms, sql in heapq.nlargest(SLOWEST, data['slowest'])
+            ],
+        })
+    endpoints.sort(key=lambda e: e['total_ms']['p95'], reverse=True)
+    return {'workers': len(snapshots), 'endpoints': endpoints}
+
+
+def current_report():
+    publish()
+    return report(collect())
+
+
+def _url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _time_serializers()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def _finish(self, request, profile):
+        record(_url_name(request), profile.sample(), profile.timer.slowest)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        with _Profile() as profile:
+            request._profile = profile
+            response = self.get_response(request)
+        self._finish(request, profile)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        with _Profile() as profile:
+            request._profile = profile
+            response = await self.get_response(request)
+        self._finish(request, profile)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook
+        profile = getattr(request, '_profile', None)
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+        return response
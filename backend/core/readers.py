@@ -0,0 +1,97 @@
+"""
+Streaming readers for uploaded spreadsheets.
+
+Rows are produced one at a time (openpyxl read-only mode for .xlsx, the csv
+module for .csv), so memory use does not depend on the size of the sheet.
+"""
+import csv
+import io
+import os
+
+import openpyxl
+
+
+class MissingColumnError(Exception):
+    pass
+
+
+class SheetReader:
+    """
+    Iterate an uploaded sheet as (row_number, {column: value}) pairs.
+
+    The header row is read and validated when the reader is created, so a
+    sheet with missing columns fails before any row is processed. Row numbers
+    match what the user sees in Excel (the header is row 1). Blank rows are
+    skipped, and cells missing from the end of a short row (CSV writers often
+    drop trailing empty cells) read as None, like empty ones.
+    """
+
+    def __init__(self, file_obj, required_columns=()):
+        self.file_obj = file_obj
+        self._workbook = None
+        self._text = None
+
+        if is_csv(file_obj):
+            self._rows = self._csv_rows()
+            self.total_rows = None  # unknown until the end of the stream
+        else:
+            self._rows = self._xlsx_rows()
+            self.total_rows = self._xlsx_total_rows()
+
+        header = next(self._rows, None) or ()
+        self.columns = [str(c).strip() if c is not None else '' for c in header]
+        missing = [c for c in required_columns if c not in self.columns]
+        if missing:
+            self.close()
+            raise MissingColumnError(", ".join(missing))
+
+    def __iter__(self):
+        try:
+            for row_number, values in enumerate(self._rows, start=2):
+                if all(v is None or v == '' for v in values):
+                    continue
+                padding = (None,) * (len(self.columns) - len(values))
+                yield row_number, dict(zip(self.columns, (*values, *padding)))
+        finally:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        if self._text is not None:
+            # Leave the upload itself open; its owner closes it
+            self._text.detach()
+            self._text = None
+
+    # --- Formats ---
+
+    def _xlsx_rows(self):
+        self._workbook = openpyxl.load_workbook(self.file_obj, read_only=True, data_only=True)
+        self._sheet = self._workbook.active
+        return self._sheet.iter_rows(values_only=True)
+
+    def _xlsx_total_rows(self):
+        # Taken from the sheet's stored dimensions; may be missing or include blank rows
+        max_row = self._sheet.max_row
+        return max_row - 1 if max_row else None
+
+    def _csv_rows(self):
+        self._text = io.TextIOWrapper(self.file_obj, encoding='utf-8-sig', newline='')
+        return csv.reader(self._text)
+
+
+def is_csv(file_obj):
+    name = getattr(file_obj, 'name', '') or ''
+    if name:
+        return os.path.splitext(name)[1].lower() == '.csv'
+    # No name: .xlsx files are zip archives
+    start = file_obj.read(2)
+    file_obj.seek(0)
+    return start != b'PK'
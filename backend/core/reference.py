@@ -0,0 +1,96 @@
+"""
+In-process reference data: departments, levels, academic years and courses.
+
+They change a few times a year, yet nearly every page and every import row
+looks one of them up by name. Each process keeps a Snapshot of all four
+tables with case-folded name -> ids maps, read by the views, the importers
+and the combined /api/reference/ endpoint. Names aren't unique in the
+database; a name shared by several rows is never guessed between:
+get_id() raises AmbiguousName, and callers reject the row or request.
+
+A snapshot is tagged with the version of the 'reference' scope
+(core.cache). Saving or deleting any of the four models calls
+reference_changed(), which bumps the version once the transaction commits;
+every process then reloads (four queries) on its next lookup. Until the
+commit, lookups keep returning committed rows only, also in the process
+making the change. Code that writes these tables with bulk_create must
+call it itself.
+"""
+import threading
+
+from .cache import REFERENCE_SCOPE, invalidate, scope_versions
+from .models import AcademicYear, Course, Department, Level
+
+
+def fold(name):
+    return (name or '').strip().casefold()
+
+
+def _by_name(rows, field='name'):
+    found = {}
+    for row in rows:
+        found.setdefault(fold(row[field]), []).append(row['id'])
+    return {name: tuple(ids) for name, ids in found.items()}
+
+
+class AmbiguousName(Exception):
+    def __init__(self, kind, name, count):
+        super().__init__(f"{kind.capitalize()} name '{name}' matches {count} {kind}s")
+
+
+class Snapshot:
+    def __init__(self, version):
+        self.version = version
+        self.departments = list(Department.objects.order_by('id').values('id', 'name', 'code'))
+        self.levels = list(Level.objects.order_by('id').values('id', 'name'))
+        self.years = list(AcademicYear.objects.order_by('id').values('id', 'year', 'is_active'))
+        self.courses = list(Course.objects.order_by('id').values(
+            'id', 'name', 'code', 'credit_hours', 'department', 'level', 'semester'
+        ))
+        self._names = {
+            'department': _by_name(self.departments),
+            'level': _by_name(self.levels),
+            'year': _by_name(self.years, 'year'),
+            'course': _by_name(self.courses),
+        }
+
+    def get_id(self, kind, name):
+        """Id of the department/level/year/course called `name` (any case), or None."""
+        ids = self._names[kind].get(fold(name), ())
+        if len(ids) > 1:
+            raise AmbiguousName(kind, name, len(ids))
+        return ids[0] if ids else None
+
+    def as_dict(self):
+        return {
+            'version': self.version,
+            'departments': self.departments,
+            'levels': self.levels,
+            'years': self.years,
+            'courses': self.courses,
+        }
+
+
+class ReferenceData:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+
+    def get(self):
+        """The current snapshot; one cache read, plus a reload after a change."""
+        version = scope_versions([REFERENCE_SCOPE])[0]
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.version != version:
+            with self.lock:
+                if self.snapshot is None or self.snapshot.version != version:
+                    self.snapshot = Snapshot(version)
+                snapshot = self.snapshot
+        return snapshot
+
+
+reference_data = ReferenceData()
+
+
+def reference_changed():
+    # Not before the commit: a snapshot must never hold rows that may still roll back
+    invalidate(REFERENCE_SCOPE)
@@ -0,0 +1,71 @@
+"""
+Read-replica routing for the student read endpoints.
+
+Views wrapped in @read_from_replica send their ORM reads to
+settings.READ_REPLICA while handling GET/HEAD requests. Everything else,
+including all writes and authentication, stays on the primary. With no
+replica configured the router does nothing. core.cache pins a view to the
+primary (pin_to_primary) while a change may not have reached the replica.
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+
+from django.conf import settings
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+_pinned = contextvars.ContextVar('pinned_to_primary', default=False)
+
+
+@contextlib.contextmanager
+def pin_to_primary(pinned=True):
+    """Reads inside go to the primary, even in a @read_from_replica view."""
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def read_from_replica(view):
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+            # sync_to_async copies the context, so the ORM threads see the flag
+            token = _use_replica.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _use_replica.reset(token)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.READ_REPLICA and _use_replica.get() and not _pinned.get():
+            return settings.READ_REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,248 @@
+"""
+In-process typeahead index of students (username, first_name, national_id).
+
+Each web process keeps its own StudentIndex:
+
+    ids           sorted (value, id) lists of usernames and national ids,
+                  searched by prefix with bisect
+    name words    sorted vocabulary of the words in first_name, each with
+                  the ids using it (prefix search), plus word trigrams for
+                  typos ("mohamad" -> "mohamed")
+
+Names repeat a lot, so the trigram index covers a few thousand distinct
+words rather than every student, and stays small.
+
+Changes reach every process through a journal in the cache: User signals
+and the student importer call students_changed(), which appends the ids (or
+usernames) under an incrementing sequence number. Before each search, a
+process reloads just the students changed since its last sequence (one
+query). It rebuilds from scratch when it has fallen more than
+MAX_REPLAY entries behind, when journal entries have expired, or every
+SEARCH_INDEX_MAX_AGE seconds. The periodic rebuild covers caches without an
+atomic incr() (file-based), where two simultaneous changes can collide.
+"""
+import bisect
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+SEQ_KEY = 'search:students:seq'
+CHANGE_TTL = 3600
+MAX_REPLAY = 500
+# Fuzzy matches need at least this share of trigrams in common (Jaccard)
+MIN_SIMILARITY = 0.4
+FIELDS = ('id', 'username', 'first_name', 'national_id', 'department_id', 'level_id')
+
+
+def _change_key(seq):
+    return f'search:students:change:{seq}'
+
+
+def _words(text):
+    return (text or '').lower().split()
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared) if shared else 0.0
+
+
+def students_changed(ids=(), usernames=()):
+    """Tell every process's index to reload these students (after the transaction commits)."""
+    change = {'ids': sorted(set(ids)), 'usernames': sorted(set(usernames))}
+    if not change['ids'] and not change['usernames']:
+        return
+
+    def publish():
+        cache.add(SEQ_KEY, 0, None)
+        seq = cache.incr(SEQ_KEY)
+        cache.set(_change_key(seq), change, CHANGE_TTL)
+
+    transaction.on_commit(publish)
+
+
+class _Prefixes:
+    """Sorted (key, id) pairs with prefix lookup; updates are an insort/delete."""
+
+    def __init__(self, pairs=()):
+        self.pairs = sorted(pairs)
+
+    def add(self, key, pk):
+        bisect.insort(self.pairs, (key, pk))
+
+    def remove(self, key, pk):
+        i = bisect.bisect_left(self.pairs, (key, pk))
+        if i < len(self.pairs) and self.pairs[i] == (key, pk):
+            del self.pairs[i]
+
+    def starting_with(self, prefix):
+        i = bisect.bisect_left(self.pairs, (prefix,))
+        while i < len(self.pairs) and self.pairs[i][0].startswith(prefix):
+            yield self.pairs[i]
+            i += 1
+
+
+class StudentIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seq = None
+        self.built_at = 0.0
+
+    # --- Building and updating ---
+
+    def _students(self, query=None):
+        students = get_user_model().objects.filter(role='STUDENT')
+        if query is not None:
+            students = students.filter(query)
+        return students.values_list(*FIELDS)
+
+    def rebuild(self):
+        seq = cache.get(SEQ_KEY, 0)
+        self.records = {}
+        self.by_username = {}
+        self.words = {}  # word -> set of ids
+        self.word_trigrams = {}  # trigram -> set of words
+        self.id_prefixes = _Prefixes()
+        self.word_prefixes = _Prefixes()
+
+        rows = list(self._students())
+        pairs = []
+        for row in rows:
+            self._add(row, sorted_insert=False)
+            pairs.append((row[1].lower(), row[0]))
+            if row[3]:
+                pairs.append((row[3], row[0]))
+        # One sort instead of thousands of insorts
+        self.id_prefixes = _Prefixes(pairs)
+        self.word_prefixes = _Prefixes((word, 0) for word in self.words)
+        self.seq = seq
+        self.built_at = time.monotonic()
+
+    def _add(self, row, sorted_insert=True):
+        pk, username, first_name, national_id = row[:4]
+        self.records[pk] = row
+        self.by_username[username] = pk
+        if sorted_insert:
+            self.id_prefixes.add(username.lower(), pk)
+            if national_id:
+                self.id_prefixes.add(national_id, pk)
+        for word in set(_words(first_name)):
+            if word not in self.words:
+                self.words[word] = set()
+                for gram in trigrams(word):
+                    self.word_trigrams.setdefault(gram, set()).add(word)
+                if sorted_insert:
+                    self.word_prefixes.add(word, 0)
+            self.words[word].add(pk)
+
+    def _remove(self, pk):
+        pk, username, first_name, national_id = self.records.pop(pk)[:4]
+        self.by_username.pop(username, None)
+        self.id_prefixes.remove(username.lower(), pk)
+        if national_id:
+            self.id_prefixes.remove(national_id, pk)
+        for word in set(_words(first_name)):
+            ids = self.words.get(word)
+            if ids is None:
+                continue
+            ids.discard(pk)
+            if not ids:
+                # Last student with this word: drop it from the vocabulary
+                del self.words[word]
+                self.word_prefixes.remove(word, 0)
+                for gram in trigrams(word):
+                    self.word_trigrams[gram].discard(word)
+
+    def _reload(self, changes):
+        ids = {pk for change in changes for pk in change['ids']}
+        usernames = {name for change in changes for name in change['usernames']}
+        ids |= {self.by_username[name] for name in usernames if name in self.by_username}
+        for pk in ids & self.records.keys():
+            self._remove(pk)
+        for row in self._students(Q(pk__in=ids) | Q(username__in=usernames)):
+            if row[0] in self.records:
+                self._remove(row[0])
+            self._add(row)
+
+    def sync(self):
+        """Bring the index up to date with the journal (or rebuild it)."""
+        if self.seq is None or time.monotonic() - self.built_at > settings.SEARCH_INDEX_MAX_AGE:
+            return self.rebuild()
+        seq = cache.get(SEQ_KEY, 0)
+        if seq == self.seq:
+            return
+        if seq < self.seq or seq - self.seq > MAX_REPLAY:
+            return self.rebuild()
+        keys = [_change_key(n) for n in range(self.seq + 1, seq + 1)]
+        found = cache.get_many(keys)
+        if len(found) != len(keys):
+            return self.rebuild()
+        self._reload([found[key] for key in keys])
+        self.seq = seq
+
+    # --- Searching ---
+
+    def _token_matches(self, token):
+        """{id: rank} for one query word; lower ranks sort first."""
+        matches = {}
+
+        def hit(pk, rank):
+            if rank < matches.get(pk, 99):
+                matches[pk] = rank
+
+        # 1. Student ID / national ID: exact, then prefix
+        for key, pk in self.id_prefixes.starting_with(token):
+            hit(pk, 0 if key == token else 1)
+        # 2. Name words by prefix
+        for word, _ in self.word_prefixes.starting_with(token):
+            for pk in self.words[word]:
+                hit(pk, 2 if word == token else 3)
+        # 3. Similar name words (typos), only when nothing started with the token
+        if not matches and len(token) >= 3:
+            grams = trigrams(token)
+            candidates = set().union(*(self.word_trigrams.get(g, ()) for g in grams))
+            for word in candidates:
+                if similarity(grams, trigrams(word)) >= MIN_SIMILARITY:
+                    for pk in self.words[word]:
+                        hit(pk, 4)
+        return matches
+
+    def search(self, query, limit=10, department_id=None, level_id=None):
+        """Ids of the best matching students: every word of `query` must match."""
+        tokens = _words(query)
+        if not tokens:
+            return []
+        with self.lock:
+            self.sync()
+            ranked = None
+            for token in tokens:
+                matches = self._token_matches(token)
+                if ranked is None:
+                    ranked = matches
+                else:
+                    ranked = {pk: rank + matches[pk] for pk, rank in ranked.items() if pk in matches}
+                if not ranked:
+                    return []
+
+            records = self.records
+            rows = (
+                (rank, records[pk][1], pk) for pk, rank in ranked.items()
+                if (department_id is None or records[pk][4] == department_id)
+                and (level_id is None or records[pk][5] == level_id)
+            )
+            # Only the first `limit` are ordered: a one-letter prefix can match everyone
+            return [pk for _, _, pk in heapq.nsmallest(limit, rows)]
+
+
+student_index = StudentIndex()
@@ -1,7 +1,23 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Department, AcademicYear, Level, Course, Grade, News, Attendance, Material, Certificate, Exam
+from .models import Department, AcademicYear, Level, Course, Grade, News, Attendance, Material, Certificate, Exam, ImportJob, StudentTranscript, UploadSession
 from rest_framework.fields import SerializerMethodField
 import datetime
+from .downloads import download_url
+
+class DynamicFieldsMixin:
+    """Lets GET clients trim the payload with ?fields=id,score,..."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        wanted = request.query_params.get('fields')
+        if wanted:
+            keep = {name.strip() for name in wanted.split(',')}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
 
 class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -31,31 +47,42 @@ class CourseSerializer(serializers.ModelSerializer):
             'student_grade', 'student_attendance' ,'next_exam'
         ]
 
+    # The listing view preloads grades, attendance and next exams into the
+    # context (see views.student_course_context); the queries below are only
+    # the fallback for a single course.
+
     def get_student_grade(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous: return None
-        try:
+        if 'grades' in self.context:
+            grade = self.context['grades'].get(obj.id)
+        else:
+            user = self.context.get('request').user
+            if user.is_anonymous: return None
             # Find grade for this specific student and course
-            grade = Grade.objects.get(student=user, course=obj)
-            return {"score": grade.score, "letter": grade.letter_grade}
-        except Grade.DoesNotExist:
+            grade = Grade.objects.filter(student=user, course=obj).first()
+        if grade is None:
             return None
+        return {"score": grade.score, "letter": grade.letter_grade}
 
     def get_student_attendance(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous: return None
-        try:
+        if 'attendance' in self.context:
+            att = self.context['attendance'].get(obj.id)
+        else:
+            user = self.context.get('request').user
+            if user.is_anonymous: return None
             # Find attendance for this specific student and course
-            att = Attendance.objects.get(student=user, course=obj)
-            return {"percentage": att.percentage, "attended": att.attended_lectures, "total": att.total_lectures}
-        except Attendance.DoesNotExist:
+            att = Attendance.objects.filter(student=user, course=obj).first()
+        if att is None:
             return None
+        return {"percentage": att.percentage, "attended": att.attended_lectures, "total": att.total_lectures}
         
     def get_next_exam(self, obj):
-        # Find exams for this course that are today or in the future
-        today = datetime.date.today()
-        # Note: 'exams' works because we set related_name='exams' in the Model
-        exam = obj.exams.filter(date__gte=today).order_by('date', 'time').first()
+        if 'next_exams' in self.context:
+            exam = self.context['next_exams'].get(obj.id)
+        else:
+            # Find exams for this course that are today or in the future
+            today = datetime.date.today()
+            # Note: 'exams' works because we set related_name='exams' in the Model
+            exam = obj.exams.filter(date__gte=today).order_by('date', 'time').first()
         
         if exam:
             return {
@@ -65,7 +92,7 @@ class CourseSerializer(serializers.ModelSerializer):
                 "location": exam.location
             }
         return None
-class GradeSerializer(serializers.ModelSerializer):
+class GradeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Existing fields
     course_name = serializers.CharField(source='course.name', read_only=True)
     course_code = serializers.CharField(source='course.code', read_only=True)
@@ -96,22 +123,82 @@ class AttendanceSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = ['id', 'course_name', 'course_code', 'attended_lectures', 'total_lectures', 'percentage']
 
+def protected_file_url(serializer, kind, obj):
+    # A download link checked by core.downloads, not the raw /media/ path
+    request = serializer.context.get('request')
+    return download_url(kind, obj.pk, request.user if request else None)
+
 class MaterialSerializer(serializers.ModelSerializer):
+    file = serializers.SerializerMethodField()
+
     class Meta:
         model = Material
         fields = ['id', 'title', 'file', 'uploaded_at']
 
+    def get_file(self, obj):
+        return protected_file_url(self, 'material', obj)
+
 class CertificateSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.first_name', read_only=True)
+    file = serializers.SerializerMethodField()
     
     class Meta:
         model = Certificate
         fields = ['id', 'student', 'student_name', 'file', 'uploaded_at']
 
+    def get_file(self, obj):
+        return protected_file_url(self, 'certificate', obj)
+
 class ExamSerializer(serializers.ModelSerializer):
     course_name = serializers.CharField(source='course.name', read_only=True)
     course_code = serializers.CharField(source='course.code', read_only=True)
 
     class Meta:
         model = Exam
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    total_rows = serializers.SerializerMethodField()
+    processed = serializers.SerializerMethodField()
+    skipped = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'kind', 'status', 'total_rows', 'processed', 'skipped', 'errors',
+            'result', 'message', 'created_at', 'started_at', 'finished_at'
+        ]
+
+    # While a job runs, the counters come from the worker's live progress
+    def get_total_rows(self, obj):
+        return self.context['progress']['total_rows']
+
+    def get_processed(self, obj):
+        return self.context['progress']['processed']
+
+    def get_skipped(self, obj):
+        return self.context['progress']['skipped']
+
+class StudentTranscriptSerializer(serializers.ModelSerializer):
+    student_id = serializers.CharField(source='student.username', read_only=True)
+    student_name = serializers.CharField(source='student.first_name', read_only=True)
+    department = serializers.CharField(source='student.department.name', read_only=True, default="-")
+    level = serializers.CharField(source='student.level.name', read_only=True, default="-")
+
+    class Meta:
+        model = StudentTranscript
+        fields = [
+            'student_id', 'student_name', 'department', 'level', 'gpa', 'total_credits',
+            'earned_credits', 'graded_courses', 'semesters', 'updated_at'
+        ]
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'course', 'title', 'filename', 'size', 'sha256', 'received', 'status', 'material', 'chunk_size']
+
+    # Largest chunk the server accepts
+    def get_chunk_size(self, obj):
+        return settings.UPLOAD_MAX_CHUNK_SIZE
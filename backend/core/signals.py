@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import COURSES_SCOPE, NEWS_SCOPE, cohort_scope, invalidate, materials_scope, records_scope, user_scope
+from .models import (
+    AcademicYear, Attendance, Certificate, Course, Department, Exam, Grade, Level, Material, News, TeachingAssignment,
+)
+from .permissions import forget_assignments
+from .reference import reference_changed
+from .search import students_changed
+from .transcripts import refresh_transcripts
+
+
+# --- Response cache / ETag invalidation (see core.cache) ---
+# Bulk uploads skip these signals; the importers invalidate explicitly.
+
+@receiver([post_save, post_delete], sender=Grade)
+@receiver([post_save, post_delete], sender=Attendance)
+def student_record_changed(sender, instance, **kwargs):
+    invalidate(user_scope(instance.student_id), records_scope(instance.course_id))
+
+
+@receiver([post_save, post_delete], sender=Exam)
+def exam_changed(sender, instance, **kwargs):
+    course = instance.course
+    invalidate(cohort_scope(course.department_id, course.level_id))
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    invalidate(COURSES_SCOPE)
+
+
+@receiver([post_save, post_delete], sender=News)
+def news_changed(sender, instance, **kwargs):
+    invalidate(NEWS_SCOPE)
+
+
+@receiver([post_save, post_delete], sender=Material)
+def material_changed(sender, instance, **kwargs):
+    invalidate(materials_scope(instance.course_id))
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    # A new department/level changes which courses and exams the student sees
+    invalidate(user_scope(instance.pk))
+
+
+# --- Doctor course ownership (see core.permissions) ---
+
+@receiver([post_save, post_delete], sender=TeachingAssignment)
+def assignment_changed(sender, instance, **kwargs):
+    forget_assignments(instance.doctor_id)
+
+
+# --- Materialized transcripts (see core.transcripts) ---
+# Bulk grade uploads refresh their students explicitly. After commit, so a
+# cascading student delete is finished before we look at their grades.
+
+@receiver([post_save, post_delete], sender=Grade)
+def grade_changed(sender, instance, **kwargs):
+    student_id = instance.student_id
+    transaction.on_commit(lambda: refresh_transcripts([student_id]))
+
+
+@receiver(post_save, sender=Course)
+def course_credits_changed(sender, instance, created, **kwargs):
+    # Credit hours weigh every grade of the course
+    if created:
+        return
+    course_id = instance.pk
+    transaction.on_commit(lambda: refresh_transcripts(
+        Grade.objects.filter(course_id=course_id).values_list('student_id', flat=True)
+    ))
+
+
+# --- Shared file references (see core.storage) ---
+
+@receiver(pre_save, sender=Material)
+@receiver(pre_save, sender=Certificate)
+def remember_file(sender, instance, **kwargs):
+    # The name in the database, before the new file (if any) is stored
+    if instance.pk:
+        instance._stored_file = sender.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+    # A new upload takes its own reference, even for content (and a name) already stored
+    instance._storing_file = bool(instance.file) and not instance.file._committed
+
+
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Certificate)
+def release_replaced_file(sender, instance, **kwargs):
+    previous = getattr(instance, '_stored_file', None)
+    if previous and (previous != instance.file.name or getattr(instance, '_storing_file', False)):
+        instance.file.storage.release(previous)
+    instance._stored_file = instance.file.name
+
+
+@receiver(post_delete, sender=Material)
+@receiver(post_delete, sender=Certificate)
+def release_file(sender, instance, **kwargs):
+    if instance.file.name:
+        instance.file.storage.release(instance.file.name)
+
+
+# --- Departments, levels, years and courses by name (see core.reference) ---
+
+@receiver([post_save, post_delete], sender=Department)
+@receiver([post_save, post_delete], sender=Level)
+@receiver([post_save, post_delete], sender=AcademicYear)
+@receiver([post_save, post_delete], sender=Course)
+def reference_row_changed(sender, instance, **kwargs):
+    reference_changed()
+
+
+# --- Student search index (see core.search) ---
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def user_searchable_fields_changed(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    students_changed(ids=[instance.pk])
@@ -0,0 +1,170 @@
+"""
+Content-addressed storage for materials and certificates.
+
+Every file is kept once, under the SHA-256 of its content, however many
+records point at it: the same lecture PDF uploaded to five courses costs
+the disk space (and the backup time) of one.
+
+A stored name looks like `blobs/ab/<sha256>/<original filename>`. The
+filename is only kept for downloads; every name with the same hash maps to
+the same file on disk, MEDIA_ROOT/blobs/ab/<sha256>.
+
+core.models.Blob counts the references. Saving a file through the storage
+takes one; deleting a record or replacing its file releases one (see
+core.signals), and the file is removed with the last reference. A new
+file is only moved into place when its Blob row commits, so a rollback
+leaves at most a temporary file (swept by `manage.py purge_uploads`). Files
+saved before this storage (materials/..., certificates/...) are still
+served and deleted as before; `manage.py dedupe_media` moves them in.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from django.utils.text import get_valid_filename
+
+PREFIX = 'blobs/'
+# FileField max_length of Material.file and Certificate.file
+MAX_NAME_LENGTH = 255
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(PREFIX)
+
+
+def blob_hash(name):
+    """The SHA-256 in a blob name, or None for any other name."""
+    parts = name.split('/') if is_blob_name(name) else []
+    if len(parts) == 4 and len(parts[2]) == 64 and all(c in '0123456789abcdef' for c in parts[2]):
+        return parts[2]
+    return None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def blob_path(self, sha256):
+        return super().path(f'{PREFIX}{sha256[:2]}/{sha256}')
+
+    def blob_name(self, sha256, filename):
+        prefix = f'{PREFIX}{sha256[:2]}/{sha256}/'
+        filename = get_valid_filename(os.path.basename(filename))
+        room = MAX_NAME_LENGTH - len(prefix)
+        if len(filename) > room:
+            root, ext = os.path.splitext(filename)
+            filename = root[:room - len(ext)] + ext
+        return prefix + filename
+
+    def path(self, name):
+        sha256 = blob_hash(name)
+        return self.blob_path(sha256) if sha256 else super().path(name)
+
+    def get_available_name(self, name, max_length=None):
+        # Identical content shares a name on purpose; _save() picks it
+        return name
+
+    def _save(self, name, content):
+        # 1. Hash the upload while writing it to a temporary file next to the blobs
+        tmp_dir = super().path(PREFIX + 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    fh.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            # 2. Keep it (after the commit), or drop it if the content is already stored
+            return self.store(tmp, name, digest.hexdigest(), size)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def store(self, path, filename, sha256, size=None):
+        """
+        Take a reference to the content of the local file at `path` (same
+        filesystem as MEDIA_ROOT) and return the stored name. The file is
+        moved into the store once the transaction commits, so it must stay
+        until then; it is deleted at once when that content is already there.
+        """
+        from .models import Blob
+
+        target = self.blob_path(sha256)
+        with transaction.atomic():
+            blob, created = Blob.objects.select_for_update().get_or_create(
+                sha256=sha256, defaults={'size': os.path.getsize(path) if size is None else size, 'refs': 1}
+            )
+            if not created:
+                Blob.objects.filter(pk=blob.pk).update(refs=F('refs') + 1)
+            if created or not os.path.exists(target):
+                transaction.on_commit(lambda: self._move_into_place(path, target))
+            else:
+                os.remove(path)
+        return self.blob_name(sha256, filename)
+
+    def _move_into_place(self, path, target):
+        # Another commit may have moved the same content in already
+        if not os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        if self.file_permissions_mode is not None:
+            os.chmod(target, self.file_permissions_mode)
+
+    def purge_temporary(self, older_than):
+        """Delete leftovers of uploads whose transaction rolled back; returns how many."""
+        tmp_dir = super().path(PREFIX + 'tmp')
+        if not os.path.isdir(tmp_dir):
+            return 0
+        purged = 0
+        for entry in os.scandir(tmp_dir):
+            if entry.is_file() and entry.stat().st_mtime < older_than:
+                os.remove(entry.path)
+                purged += 1
+        return purged
+
+    def delete(self, name):
+        # Shared files go through release(); the record's signals call it
+        if not blob_hash(name):
+            super().delete(name)
+
+    def release(self, name):
+        """Drop one reference to `name`; the file is deleted after the last one is committed."""
+        from .models import Blob
+
+        sha256 = blob_hash(name)
+        if not sha256:
+            # A file from before this storage belongs to one record only
+            transaction.on_commit(lambda: super(ContentAddressedStorage, self).delete(name))
+            return
+
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                return
+            if blob.refs > 1:
+                Blob.objects.filter(pk=blob.pk).update(refs=F('refs') - 1)
+                return
+            blob.delete()
+        transaction.on_commit(lambda: self._delete_unreferenced(sha256))
+
+    def _delete_unreferenced(self, sha256):
+        from .models import Blob
+
+        # Stored again in the meantime
+        if Blob.objects.filter(sha256=sha256).exists():
+            return
+        try:
+            os.remove(self.blob_path(sha256))
+        except FileNotFoundError:
+            pass
+
+
+content_storage = ContentAddressedStorage()
@@ -0,0 +1,131 @@
+"""
+Synthetic university data for benchmarks and query-plan checks.
+
+Everything is written with bulk_create, so tens of thousands of students take
+seconds. Generated rows use the `prefix` in their codes/usernames so a seed
+never collides with real data.
+"""
+import datetime
+import random
+
+from django.contrib.auth import get_user_model
+
+from .models import (
+    AcademicYear, Attendance, Course, Department, Exam, Grade, Level, Material, TeachingAssignment,
+)
+from .reference import reference_changed
+from .transcripts import refresh_transcripts
+
+User = get_user_model()
+
+LEVEL_NAMES = ['Prep Year', 'First Year', 'Second Year', 'Third Year', 'Fourth Year']
+
+
+def bulk_insert(model, objs, key, batch_size):
+    """bulk_create that always returns saved rows with primary keys, in input order."""
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    if not objs or objs[0].pk is not None:
+        return objs
+    # MySQL does not return ids from a bulk insert; re-read them by a unique key
+    saved = model.objects.in_bulk([getattr(o, key) for o in objs], field_name=key)
+    return [saved[getattr(o, key)] for o in objs]
+
+
+def seed_university(students=2000, departments=4, levels=5, courses_per_cohort=6,
+                    exams_per_course=2, materials_per_course=2, prefix='syn',
+                    batch_size=2000, seed=0, transcripts=True):
+    """
+    Create departments x levels cohorts, each with its own courses, a doctor
+    per course, and `students` spread evenly over the cohorts with a grade and
+    an attendance summary in every course of their cohort.
+    Pass transcripts=False on a schema from before core.StudentTranscript.
+    Returns the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    # Unusable password: hashing thousands of real ones would dominate the run
+    password = '!synthetic'
+
+    # 1. Reference data
+    depts = bulk_insert(Department, [
+        Department(name=f'{prefix.title()} Department {d}', code=f'{prefix}{d}'.upper()[:10])
+        for d in range(departments)
+    ], 'code', batch_size)
+    # Levels have no unique column to re-read them by; there are only a few
+    lvls = [
+        Level.objects.create(name=f'{prefix.title()} ' + (LEVEL_NAMES[l] if l < len(LEVEL_NAMES) else f'Level {l + 1}'))
+        for l in range(levels)
+    ]
+    year, _ = AcademicYear.objects.get_or_create(year=f'{prefix}-{today.year}')
+    cohorts = [(d, l) for d in depts for l in lvls]
+
+    courses = bulk_insert(Course, [
+        Course(name=f'{prefix.title()} Course {d.code}-{li}-{c}', code=f'{prefix}-{d.code}-{li}-{c}'[:20],
+               credit_hours=rng.choice([2, 3, 3, 4]), department=d, level=l, semester=rng.choice(['1', '2']))
+        for d in depts for li, l in enumerate(lvls) for c in range(courses_per_cohort)
+    ], 'code', batch_size)
+    # bulk_create sends no signals
+    reference_changed()
+    by_cohort = {}
+    for course in courses:
+        by_cohort.setdefault((course.department_id, course.level_id), []).append(course)
+
+    # 2. Staff and assignments (one doctor per course)
+    doctors = bulk_insert(User, [
+        User(username=f'{prefix}_dr_{i}', first_name=f'Doctor {i}', role='DOCTOR', password=password)
+        for i in range(len(courses))
+    ], 'username', batch_size)
+    TeachingAssignment.objects.bulk_create([
+        TeachingAssignment(doctor=dr, course=course, academic_year=year, level_id=course.level_id,
+                           semester=course.semester)
+        for dr, course in zip(doctors, courses)
+    ], batch_size=batch_size)
+
+    # 3. Students, spread round-robin over the cohorts
+    student_rows = bulk_insert(User, [
+        User(username=f'{prefix}{i:08d}', first_name=f'Student {i}', role='STUDENT', password=password,
+             department=cohorts[i % len(cohorts)][0], level=cohorts[i % len(cohorts)][1],
+             national_id=f'{rng.randrange(10**13, 10**14)}')
+        for i in range(students)
+    ], 'username', batch_size)
+
+    # 4. Grades and attendance for every course of each student's cohort
+    grades, attendance = [], []
+    counts = {'grades': 0, 'attendance': 0}
+
+    def flush(force=False):
+        if grades and (force or len(grades) >= batch_size):
+            counts['grades'] += len(Grade.objects.bulk_create(grades, batch_size=batch_size))
+            counts['attendance'] += len(Attendance.objects.bulk_create(attendance, batch_size=batch_size))
+            grades.clear()
+            attendance.clear()
+
+    for student in student_rows:
+        for course in by_cohort[(student.department_id, student.level_id)]:
+            grades.append(Grade(student=student, course=course, semester=course.semester,
+                                score=round(min(100, max(0, rng.gauss(72, 14))), 1)))
+            total = rng.choice([10, 12, 14])
+            attendance.append(Attendance(student=student, course=course, total_lectures=total,
+                                         attended_lectures=rng.randint(total // 3, total)))
+        flush()
+    flush(force=True)
+    if transcripts:
+        refresh_transcripts(s.pk for s in student_rows)
+
+    # 5. Exams and materials
+    exams = Exam.objects.bulk_create([
+        Exam(course=course, exam_type=rng.choice(['Midterm', 'Final', 'Quiz']),
+             date=today + datetime.timedelta(days=rng.randint(-60, 90)),
+             time=datetime.time(rng.choice([9, 11, 13])), location=f'Hall {rng.randint(1, 9)}')
+        for course in courses for _ in range(exams_per_course)
+    ], batch_size=batch_size)
+    materials = Material.objects.bulk_create([
+        Material(course=course, title=f'Lecture {m + 1}', file=f'materials/{prefix}_lecture_{m + 1}.pdf')
+        for course in courses for m in range(materials_per_course)
+    ], batch_size=batch_size)
+
+    return {
+        'departments': len(depts), 'levels': len(lvls), 'courses': len(courses),
+        'doctors': len(doctors), 'students': len(student_rows), **counts,
+        'exams': len(exams), 'materials': len(materials),
+    }
@@ -1,3 +1,1174 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
 
-# Create your tests here.
+import openpyxl
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+from . import async_views, profiling, uploads
+from .importers import import_attendance
+from .cache import conditional_get
+from .jobs import claim, run_pending
+from .pagination import IdCursorPagination
+from .routers import ReplicaRouter, read_from_replica
+from .benchmarks import run_benchmarks
+from .reference import reference_data
+from .search import student_index
+from .serializers import DepartmentSerializer
+from .synthetic import seed_university
+from .transcripts import refresh_transcripts
+from .models import (
+    AcademicYear, Attendance, Blob, Certificate, Course, Department, Exam, Grade, ImportJob, Level, Material,
+    News, StudentTranscript, TeachingAssignment, UploadSession,
+)
+
+
+def make_sheet(header, rows, name='sheet.xlsx'):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return SimpleUploadedFile(name, buf.getvalue())
+
+
+def without_conflict_target():
+    # As on MySQL, whose ON DUPLICATE KEY UPDATE can't name the unique fields. SQLite then
+    # runs plain INSERTs, so only rows that don't exist yet can be written with it.
+    return patch.object(connection.features, 'supports_update_conflicts_with_target', False)
+
+
+class PortalTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Electrical Engineering', code='EE')
+        cls.level = Level.objects.create(name='Fourth Year')
+        cls.year = AcademicYear.objects.create(year='2025-2026')
+        cls.course = Course.objects.create(
+            name='Digital Circuits', code='EE401', department=cls.department, level=cls.level
+        )
+        cls.doctor = User.objects.create(username='dr_hassan', role='DOCTOR')
+        TeachingAssignment.objects.create(
+            doctor=cls.doctor, course=cls.course, academic_year=cls.year, level=cls.level, semester='1'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor)
+
+    def make_students(self, count, prefix='3010101'):
+        return User.objects.bulk_create([
+            User(username=f'{prefix}{i:07d}', first_name=f'Student {i}', role='STUDENT',
+                 department=self.department, level=self.level)
+            for i in range(count)
+        ])
+
+
+GRADE_HEADER = ['department', 'level', 'semester', 'student_id', 'student_name', 'course_name', 'score']
+
+
+class UploadGradesTests(PortalTestCase):
+    def grade_rows(self, students, score=80):
+        return [
+            ['Electrical Engineering', 'Fourth Year', 1, float(s.username), s.first_name, 'digital circuits', score]
+            for s in students
+        ]
+
+    def upload(self, rows):
+        sheet = make_sheet(GRADE_HEADER, rows)
+        # A fresh request: new User instance, cold assignment cache
+        cache.clear()
+        self.client.force_authenticate(User.objects.get(pk=self.doctor.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/upload-grades/', {'file': sheet}, format='multipart')
+        return response, len(ctx.captured_queries)
+
+    def test_upserts_grades_and_reports_skipped_rows(self):
+        students = self.make_students(3)
+        Grade.objects.create(student=students[0], course=self.course, score=10, semester='1')
+        rows = self.grade_rows(students)
+        rows.append(['Electrical Engineering', 'Fourth Year', 1, 999, 'Ghost', 'Digital Circuits', 50])
+
+        response, _ = self.upload(rows)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['processed'], 3)
+        self.assertEqual(response.data['skipped'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 5)
+        self.assertEqual(Grade.objects.count(), 3)
+        self.assertEqual(Grade.objects.get(student=students[0]).score, 80)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        _, small = self.upload(self.grade_rows(self.make_students(5, prefix='1000000')))
+        # Below SQLite's ~999 parameters per statement, which would split the transcript upsert
+        _, large = self.upload(self.grade_rows(self.make_students(120, prefix='2000000')))
+        self.assertEqual(small, large)
+
+    def test_unassigned_course_is_rejected_without_writes(self):
+        other = Course.objects.create(name='Power Systems', code='EE402', department=self.department)
+        students = self.make_students(2)
+        rows = self.grade_rows(students)
+        rows.append(['Electrical Engineering', 'Fourth Year', 1, float(students[0].username), 'x', other.name, 70])
+
+        response, _ = self.upload(rows)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Grade.objects.exists())
+
+    def test_csv_upload(self):
+        students = self.make_students(2)
+        lines = [','.join(GRADE_HEADER)] + [
+            f'Electrical Engineering,Fourth Year,1,{s.username},{s.first_name},Digital Circuits,64.5'
+            for s in students
+        ]
+        sheet = SimpleUploadedFile('grades.csv', '\n'.join(lines).encode())
+
+        response = self.client.post('/api/upload-grades/', {'file': sheet}, format='multipart')
+
+        self.assertEqual(response.data['processed'], 2)
+        self.assertEqual(Grade.objects.get(student=students[1]).score, 64.5)
+
+    def test_upload_without_a_conflict_target(self):
+        students = self.make_students(2)
+        with without_conflict_target():
+            response, _ = self.upload(self.grade_rows(students))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Grade.objects.filter(score=80).count(), 2)
+        self.assertEqual(StudentTranscript.objects.filter(student__in=students).count(), 2)
+
+    def test_csv_rows_without_trailing_cells(self):
+        students = self.make_students(2)
+        lines = [
+            ','.join(GRADE_HEADER),
+            f'Electrical Engineering,Fourth Year,1,{students[0].username},{students[0].first_name},Digital Circuits',
+            f'Electrical Engineering,Fourth Year,1,{students[1].username}',
+        ]
+        sheet = SimpleUploadedFile('grades.csv', '\n'.join(lines).encode())
+
+        response = self.client.post('/api/upload-grades/', {'file': sheet}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['processed'], 1)
+        self.assertIsNone(Grade.objects.get(student=students[0]).score)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+
+    def test_missing_column(self):
+        response = self.client.post(
+            '/api/upload-grades/', {'file': make_sheet(GRADE_HEADER[:-1], [])}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('score', response.data['error'])
+
+
+ATTENDANCE_HEADER = ['department', 'level', 'semester', 'course_name', 'student_id', 'student_name',
+                     'attended_lectures', 'total_lectures']
+
+
+class UploadAttendanceTests(PortalTestCase):
+    def attendance_rows(self, students, attended=8):
+        return [
+            ['Electrical Engineering', 'Fourth Year', 1, 'Digital Circuits', float(s.username), s.first_name, attended, 10]
+            for s in students
+        ]
+
+    def upload(self, rows):
+        sheet = make_sheet(ATTENDANCE_HEADER, rows)
+        cache.clear()
+        self.client.force_authenticate(User.objects.get(pk=self.doctor.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/upload-attendance/', {'file': sheet}, format='multipart')
+        return response, len(ctx.captured_queries)
+
+    def test_upserts_attendance_with_constant_queries(self):
+        small_students = self.make_students(5, prefix='1000000')
+        _, small = self.upload(self.attendance_rows(small_students))
+        response, large = self.upload(self.attendance_rows(self.make_students(150, prefix='2000000')))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['processed'], 150)
+        self.assertEqual(small, large)
+
+        self.upload(self.attendance_rows(small_students, attended=10))
+        self.assertEqual(Attendance.objects.count(), 155)
+        self.assertEqual(Attendance.objects.get(student=small_students[0]).attended_lectures, 10)
+
+    def test_batches_write_every_row(self):
+        students = self.make_students(5)
+        rows = enumerate(
+            [dict(zip(ATTENDANCE_HEADER, r)) for r in self.attendance_rows(students)], start=2
+        )
+        result = import_attendance(rows, self.doctor, batch_size=2)
+        self.assertEqual(result.processed, 5)
+        self.assertEqual(Attendance.objects.count(), 5)
+
+    def test_upload_without_a_conflict_target(self):
+        students = self.make_students(2)
+        with without_conflict_target():
+            response, _ = self.upload(self.attendance_rows(students))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Attendance.objects.filter(attended_lectures=8).count(), 2)
+
+
+STUDENT_HEADER = ['department', 'level', 'semester', 'student_id', 'student_name']
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UploadStudentsTests(PortalTestCase):
+    def test_creates_and_updates_students_in_bulk(self):
+        existing = self.make_students(1)[0]
+        rows = [
+            ['electrical engineering', 'Fourth Year', 1, float(existing.username), 'Renamed'],
+            ['Electrical Engineering', 'fourth year', 1, 30101010000002.0, 'Sara Mohamed'],
+            ['Civil', 'Fourth Year', 1, 30101010000003.0, 'Nobody'],
+        ]
+        sheet = make_sheet(STUDENT_HEADER, rows)
+
+        response = self.client.post('/api/upload-students/', {'file': sheet}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['skipped'], 1)
+        self.assertIn('hash', response.data['timings'])
+        self.assertEqual(User.objects.get(pk=existing.pk).first_name, 'Renamed')
+        sara = User.objects.get(username='30101010000002')
+        self.assertTrue(sara.check_password('30101010000002'))
+        self.assertEqual((sara.role, sara.level), ('STUDENT', self.level))
+
+
+@override_settings(IMPORT_JOB_WORKERS=0, MEDIA_ROOT=tempfile.mkdtemp())
+class ImportJobTests(PortalTestCase):
+    def test_async_upload_returns_job_and_reports_progress(self):
+        students = self.make_students(3)
+        rows = [
+            ['Electrical Engineering', 'Fourth Year', 1, float(s.username), s.first_name, 'Digital Circuits', 75]
+            for s in students
+        ]
+        sheet = make_sheet(GRADE_HEADER, rows)
+
+        response = self.client.post('/api/upload-grades/?async=1', {'file': sheet}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        job_url = response.data['status_url']
+        self.assertEqual(self.client.get(job_url).data['status'], 'PENDING')
+        self.assertFalse(Grade.objects.exists())
+
+        self.assertEqual(run_pending(), 1)
+
+        job = self.client.get(job_url).data
+        self.assertEqual((job['status'], job['total_rows'], job['processed']), ('DONE', 3, 3))
+        self.assertEqual(Grade.objects.count(), 3)
+
+    def test_failed_job_keeps_message_and_is_private(self):
+        sheet = make_sheet(GRADE_HEADER[:-1], [])
+        job_id = self.client.post(
+            '/api/upload-grades/', {'file': sheet, 'async': 'true'}, format='multipart'
+        ).data['job_id']
+        run_pending()
+
+        job = self.client.get(f'/api/jobs/{job_id}/').data
+        self.assertEqual(job['status'], 'FAILED')
+        self.assertIn('score', job['message'])
+
+        self.client.force_authenticate(self.make_students(1)[0])
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/').status_code, 403)
+
+
+    def test_jobs_of_a_dead_worker_are_claimed_again(self):
+        sheet = make_sheet(GRADE_HEADER, [])
+        job_id = self.client.post('/api/upload-grades/?async=1', {'file': sheet}, format='multipart').data['job_id']
+        self.assertTrue(claim(job_id))
+        # Its worker is alive (fresh lease): nobody else may take it
+        self.assertEqual(run_pending(), 0)
+
+        # The worker died: the lease runs out and the job runs again
+        expired = timezone.now() - datetime.timedelta(seconds=settings.IMPORT_JOB_LEASE + 1)
+        ImportJob.objects.filter(pk=job_id).update(heartbeat_at=expired)
+        self.assertEqual(run_pending(), 1)
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.attempts), ('DONE', 2))
+
+    def test_gives_up_after_max_attempts(self):
+        sheet = make_sheet(GRADE_HEADER, [])
+        job_id = self.client.post('/api/upload-grades/?async=1', {'file': sheet}, format='multipart').data['job_id']
+        ImportJob.objects.filter(pk=job_id).update(
+            status='RUNNING', attempts=settings.IMPORT_JOB_MAX_ATTEMPTS,
+            heartbeat_at=timezone.now() - datetime.timedelta(days=1),
+        )
+        self.assertEqual(run_pending(), 1)
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'FAILED')
+        self.assertIn('Gave up', job.message)
+
+
+class StudentCoursesTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_students(1)[0]
+        self.client.force_authenticate(self.student)
+
+    def add_courses(self, count):
+        today = datetime.date.today()
+        for i in range(count):
+            course = Course.objects.create(
+                name=f'Course {i}', code=f'C{Course.objects.count()}', department=self.department, level=self.level
+            )
+            Grade.objects.create(student=self.student, course=course, score=70 + i, semester='1')
+            Attendance.objects.create(student=self.student, course=course, attended_lectures=5, total_lectures=10)
+            for days in (30, 3):
+                Exam.objects.create(course=course, date=today + datetime.timedelta(days=days),
+                                    time=datetime.time(9), location='Hall 1')
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/courses/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_courses(self):
+        self.add_courses(2)
+        _, few = self.count_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_courses(8)
+        response, many = self.count_queries()
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.data), 11)
+        course = next(c for c in response.data if c['name'] == 'Course 0')
+        self.assertEqual(course['student_grade'], {'score': 70, 'letter': 'C'})
+        self.assertEqual(course['student_attendance']['percentage'], 50.0)
+        self.assertEqual(course['next_exam']['date'], datetime.date.today() + datetime.timedelta(days=3))
+        self.assertEqual(course['department_name'], 'Electrical Engineering')
+
+
+class DashboardCacheTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_students(1)[0]
+        self.student_client = APIClient()
+        self.student_client.force_authenticate(self.student)
+
+    def test_repeat_requests_are_served_from_cache(self):
+        for url in ('/api/courses/', '/api/my-grades/', '/api/my-attendance/', '/api/student/exams/'):
+            self.assertEqual(self.student_client.get(url).status_code, 200)
+            with self.assertNumQueries(0):
+                self.student_client.get(url)
+
+    def test_grade_upload_invalidates_the_student(self):
+        self.assertEqual(self.student_client.get('/api/my-grades/').data, [])
+
+        rows = [['Electrical Engineering', 'Fourth Year', 1, self.student.username, 'x', 'Digital Circuits', 91]]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/upload-grades/', {'file': make_sheet(GRADE_HEADER, rows)}, format='multipart')
+
+        grades = self.student_client.get('/api/my-grades/').data
+        self.assertEqual([g['score'] for g in grades], [91])
+
+    def test_new_exam_invalidates_the_cohort_only(self):
+        self.student_client.get('/api/student/exams/')
+        outsider = User.objects.create(
+            username='outsider', role='STUDENT', department=self.department,
+            level=Level.objects.create(name='Second Year'),
+        )
+        outsider_client = APIClient()
+        outsider_client.force_authenticate(outsider)
+        outsider_client.get('/api/student/exams/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Exam.objects.create(course=self.course, date=datetime.date.today(), time=datetime.time(9), location='Hall 2')
+
+        self.assertEqual(len(self.student_client.get('/api/student/exams/').data), 1)
+        with self.assertNumQueries(0):
+            outsider_client.get('/api/student/exams/')
+
+
+class ConditionalGetTests(PortalTestCase):
+    def test_matching_etag_returns_304_without_queries(self):
+        for url in ('/api/courses/', '/api/my-grades/', f'/api/courses/{self.course.id}/materials/'):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_when_data_changes(self):
+        etag = self.client.get('/api/news/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            News.objects.create(title='Results are out', content='...')
+
+        response = self.client.get('/api/news/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data), 1)
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get('/api/my-grades/')['ETag']
+        self.client.force_authenticate(self.make_students(1)[0])
+        self.assertEqual(self.client.get('/api/my-grades/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class PaginationTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.students = self.make_students(7)
+        Grade.objects.bulk_create([
+            Grade(student=s, course=self.course, score=60, semester='1') for s in self.students
+        ])
+
+    def walk(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).data
+            ids += [row['id'] for row in data['results']]
+            url = data['next']
+        return ids
+
+    def test_unfiltered_grades_are_paginated_by_cursor(self):
+        ids = self.walk('/api/doctor/grades/?page_size=3')
+        self.assertEqual(ids, sorted(Grade.objects.values_list('id', flat=True)))
+
+        with patch.object(IdCursorPagination, 'max_page_size', 5):
+            page = self.client.get('/api/doctor/grades/?page_size=100000').data
+        self.assertEqual(len(page['results']), 5)  # capped by max_page_size, not unbounded
+        self.assertIsNotNone(page['next'])
+
+    def test_course_listing_keeps_plain_list_and_trims_fields(self):
+        response = self.client.get(f'/api/doctor/grades/?course_id={self.course.id}&fields=id,score')
+        self.assertEqual(len(response.data), 7)
+        self.assertEqual(set(response.data[0]), {'id', 'score'})
+
+    def test_students_pages(self):
+        ids = self.walk('/api/students/?page_size=2&fields=id')
+        self.assertEqual(ids, [s.id for s in self.students])
+        filtered = self.client.get('/api/students/?dept=electrical engineering&level=fourth year')
+        self.assertEqual(len(filtered.data), 7)
+
+
+class SyntheticDataTests(TestCase):
+    def test_seed_university(self):
+        counts = seed_university(students=40, departments=2, levels=2, courses_per_cohort=3)
+        self.assertEqual(counts['courses'], 12)
+        self.assertEqual(counts['grades'], 40 * 3)
+        self.assertEqual(User.objects.filter(role='STUDENT').count(), 40)
+        self.assertEqual(TeachingAssignment.objects.count(), 12)
+
+
+class ExplainIndexesCommandTests(SimpleTestCase):
+    def test_runs_on_the_pre_index_schema(self):
+        # The command creates and destroys its own scratch database, so it can't share this test's one
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'explain_indexes', '--students', '20', '--repeat', '1'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=300,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('students of a cohort', result.stdout)
+
+
+class CourseOwnershipTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = Course.objects.create(name='Power Systems', code='EE402', department=self.department)
+
+    def exam(self, course):
+        return self.client.post('/api/doctor/exams/', {
+            'course': course.id, 'exam_type': 'Quiz', 'date': '2030-01-01', 'time': '09:00', 'location': 'Hall 1'
+        })
+
+    def test_exam_scheduling_requires_assignment(self):
+        self.assertEqual(self.exam(self.course).status_code, 201)
+        self.assertEqual(self.exam(self.other).status_code, 403)
+
+    def test_assignments_are_cached_until_they_change(self):
+        self.exam(self.course)
+        with self.assertNumQueries(1):  # the serializer's Course lookup only
+            self.assertEqual(self.exam(self.other).status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TeachingAssignment.objects.create(
+                doctor=self.doctor, course=self.other, academic_year=self.year, level=self.level, semester='1'
+            )
+        # Next request (a new User instance) sees the new assignment
+        self.client.force_authenticate(User.objects.get(pk=self.doctor.pk))
+        self.assertEqual(self.exam(self.other).status_code, 201)
+
+
+class ReplicaRoutingTests(TestCase):
+    def route(self, method):
+        @read_from_replica
+        def view(request):
+            return ReplicaRouter().db_for_read(Grade)
+        return view(type('Request', (), {'method': method})())
+
+    def test_only_wrapped_gets_read_from_the_replica(self):
+        with override_settings(READ_REPLICA='replica'):
+            self.assertEqual(self.route('GET'), 'replica')
+            self.assertIsNone(self.route('POST'))
+            self.assertIsNone(ReplicaRouter().db_for_read(Grade))
+        with override_settings(READ_REPLICA=None):
+            self.assertIsNone(self.route('GET'))
+
+    def test_new_versions_are_built_from_the_primary(self):
+        @conditional_get('replica_test', scopes=('news',))
+        @read_from_replica
+        def view(request):
+            response = HttpResponse()
+            response.db = ReplicaRouter().db_for_read(Grade)
+            return response
+
+        cache.clear()
+        request = RequestFactory().get('/')
+        request.user = None
+        with override_settings(READ_REPLICA='replica', READ_REPLICA_MAX_LAG=30):
+            # Just changed: the replica may not have it yet
+            self.assertIsNone(view(request).db)
+            with patch('core.cache.time.time', return_value=time.time() + 31):
+                self.assertEqual(view(request).db, 'replica')
+
+
+class AsyncViewsTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_students(1)[0]
+        Grade.objects.create(student=self.student, course=self.course, score=88, semester='1')
+        Attendance.objects.create(student=self.student, course=self.course, attended_lectures=8, total_lectures=10)
+        Exam.objects.create(course=self.course, date=datetime.date.today(), time=datetime.time(9), location='Hall 1')
+        News.objects.create(title='Welcome', content='Term starts', is_public=True)
+        self.client.force_authenticate(self.student)
+
+    def async_get(self, view, path, token=True, **headers):
+        if token:
+            headers['Authorization'] = f'Bearer {RefreshToken.for_user(self.student).access_token}'
+        return async_to_sync(view)(AsyncRequestFactory().get(path, headers=headers))
+
+    def test_async_views_match_the_sync_ones(self):
+        for path, view in (('/api/courses/', async_views.get_courses),
+                           ('/api/my-grades/', async_views.get_my_grades),
+                           ('/api/my-attendance/', async_views.get_my_attendance),
+                           ('/api/student/exams/', async_views.get_student_exams),
+                           ('/api/news/', async_views.get_news)):
+            sync = self.client.get(path)
+            cache.clear()
+            response = self.async_get(view, path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(response.content, sync.content, path)
+            self.assertEqual(response['ETag'], self.async_get(view, path)['ETag'], path)
+
+    def test_async_etag_and_authentication(self):
+        etag = self.async_get(async_views.get_my_grades, '/api/my-grades/')['ETag']
+        self.assertEqual(
+            self.async_get(async_views.get_my_grades, '/api/my-grades/', **{'If-None-Match': etag}).status_code, 304
+        )
+        self.assertEqual(self.async_get(async_views.get_my_grades, '/api/my-grades/', token=False).status_code, 401)
+        self.assertEqual(
+            self.async_get(async_views.get_my_grades, '/api/my-grades/', token=False,
+                           Authorization='Bearer nonsense').status_code, 401
+        )
+
+
+class TranscriptTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_students(1)[0]
+        self.lab = Course.objects.create(
+            name='Circuits Lab', code='EE403', credit_hours=1, department=self.department, level=self.level
+        )
+
+    def test_single_grade_writes_update_the_transcript(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(student=self.student, course=self.course, score=92, semester='1')  # A, 3 credits
+            Grade.objects.create(student=self.student, course=self.lab, score=40, semester='2')  # F, 1 credit
+
+        transcript = StudentTranscript.objects.get(student=self.student)
+        self.assertEqual(transcript.gpa, 3.0)
+        self.assertEqual((transcript.total_credits, transcript.earned_credits), (4, 3))
+        self.assertEqual([s['gpa'] for s in transcript.semesters], [4.0, 0.0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.filter(course=self.lab).delete()
+            self.course.credit_hours = 4
+            self.course.save()
+        transcript.refresh_from_db()
+        self.assertEqual((transcript.gpa, transcript.total_credits), (4.0, 4))
+
+    def test_bulk_upload_builds_transcripts_and_the_endpoint_is_one_query(self):
+        students = self.make_students(3, prefix='4000000')
+        rows = [['Electrical Engineering', 'Fourth Year', 1, s.username, s.first_name, 'Digital Circuits', score]
+                for s, score in zip(students, (95, 70, 30))]
+        self.client.post('/api/upload-grades/', {'file': make_sheet(GRADE_HEADER, rows)}, format='multipart')
+        self.assertEqual(
+            list(StudentTranscript.objects.order_by('student__username').values_list('gpa', flat=True)),
+            [4.0, 2.0, 0.0],
+        )
+
+        self.client.force_authenticate(students[0])
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/my-transcript/')
+        self.assertEqual(response.data['gpa'], 4.0)
+        self.assertEqual(response.data['department'], 'Electrical Engineering')
+
+        self.client.force_authenticate(self.doctor)
+        ranking = self.client.get('/api/transcripts/?dept=electrical engineering').data
+        self.assertEqual([(r['rank'], r['student_id']) for r in ranking][:3],
+                         [(1, students[0].username), (2, students[1].username), (3, students[2].username)])
+
+    def test_refresh_without_a_conflict_target(self):
+        Grade.objects.bulk_create([Grade(student=self.student, course=self.course, score=92, semester='1')])
+        with without_conflict_target():
+            refresh_transcripts([self.student.pk])
+        self.assertEqual(StudentTranscript.objects.get(student=self.student).gpa, 4.0)
+
+
+class GradeAnalyticsTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        students = self.make_students(4)
+        for student, score, attended in zip(students, (95, 80, 60, 40), (10, 9, 6, 3)):
+            Grade.objects.create(student=student, course=self.course, score=score, semester='1')
+            Attendance.objects.create(student=student, course=self.course, attended_lectures=attended, total_lectures=10)
+
+    def test_course_statistics(self):
+        with self.assertNumQueries(4):  # assignments, courses in scope, aggregate, score distribution
+            data = self.client.get(f'/api/analytics/grades/?course_id={self.course.id}').data
+        self.assertEqual(data['graded'], 4)
+        self.assertEqual(data['mean'], 68.75)
+        self.assertEqual(data['median'], 70.0)
+        self.assertEqual(data['letters'], {'F': 1, 'D': 1, 'C': 0, 'B': 1, 'A-': 0, 'A': 1})
+        self.assertEqual(data['at_risk'], 2)  # the 60 (60% attendance) and the 40
+        self.assertGreater(data['attendance_score_correlation'], 0.9)
+
+    def test_results_are_cached_until_grades_change(self):
+        url = '/api/analytics/grades/?dept=Electrical Engineering&level=fourth year'
+        self.assertEqual(self.client.get(url).data['graded'], 4)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.filter(score=40).update(score=None)
+            Grade.objects.get(score=95).save()
+        self.assertEqual(self.client.get(url).data['graded'], 3)
+
+    def test_doctors_only_see_their_courses(self):
+        other = Course.objects.create(name='Power Systems', code='EE402', department=self.department)
+        self.assertEqual(self.client.get(f'/api/analytics/grades/?course_id={other.id}').status_code, 403)
+        self.assertEqual(self.client.get('/api/analytics/grades/?dept=electrical engineering').data['courses'], 1)
+
+
+class ExportTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.students = self.make_students(3)
+        for i, student in enumerate(self.students):
+            Grade.objects.create(student=student, course=self.course, score=70 + i, semester='1')
+            Attendance.objects.create(student=student, course=self.course, attended_lectures=i, total_lectures=10)
+
+    def test_grades_csv_streams_in_the_upload_format(self):
+        with self.assertNumQueries(3):  # course, assignments, one cursor over the grades
+            response = self.client.get(f'/api/export/grades/?course_id={self.course.id}')
+            lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertTrue(response.streaming)
+        self.assertEqual(lines[0], ','.join(GRADE_HEADER))
+        self.assertEqual(lines[1], f'Electrical Engineering,Fourth Year,1,{self.students[0].username},Student 0,Digital Circuits,70.0')
+        self.assertEqual(len(lines), 4)
+
+    def test_exported_xlsx_can_be_uploaded_again(self):
+        response = self.client.get(f'/api/export/attendance/?course_id={self.course.id}&type=xlsx')
+        sheet = SimpleUploadedFile('attendance.xlsx', b''.join(response.streaming_content))
+        Attendance.objects.update(attended_lectures=0)
+
+        upload = self.client.post('/api/upload-attendance/', {'file': sheet}, format='multipart')
+        self.assertEqual(upload.data['processed'], 3)
+        self.assertEqual(sorted(Attendance.objects.values_list('attended_lectures', flat=True)), [0, 1, 2])
+
+    def test_exports_are_limited_to_staff_and_assigned_courses(self):
+        other = Course.objects.create(name='Power Systems', code='EE402', department=self.department)
+        self.assertEqual(self.client.get(f'/api/export/grades/?course_id={other.id}').status_code, 403)
+        self.assertEqual(self.client.get('/api/export/students/').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create(username='registrar', role='ADMIN'))
+        response = self.client.get('/api/export/students/?dept=electrical engineering&type=xlsx')
+        rows = list(openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content))).active.values)
+        self.assertEqual(rows[0], ('department', 'level', 'student_id', 'student_name'))
+        self.assertEqual(len(rows), 4)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class DownloadTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material = Material.objects.create(
+                course=self.course, title='Lecture 1', file=SimpleUploadedFile('Lecture_1.pdf', b'%PDF-1.4 lecture')
+            )
+        self.student = self.make_students(1)[0]
+
+    def test_enrolled_student_follows_the_signed_link(self):
+        self.client.force_authenticate(self.student)
+        link = self.client.get(f'/api/courses/{self.course.id}/materials/').data[0]['file']
+
+        anonymous = APIClient()
+        response = anonymous.get(link)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 lecture')
+        # Unsigned, or signed for another file
+        self.assertEqual(anonymous.get(link.split('?')[0]).status_code, 401)
+        self.assertEqual(anonymous.get(f'/api/files/certificate/{self.material.pk}/?' + link.split('?')[1]).status_code, 401)
+
+    def test_signed_links_expire(self):
+        self.client.force_authenticate(self.student)
+        url = f'/api/courses/{self.course.id}/materials/'
+        response = self.client.get(url)
+        link, etag = response.data[0]['file'], response['ETag']
+        now = time.time()
+
+        # Same links and ETag within a period; both change with the next one
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with patch('core.downloads.time.time', return_value=now + 3600):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+            self.assertEqual(APIClient().get(link).status_code, 200)
+        with patch('core.downloads.time.time', return_value=now + 2 * 3600):
+            self.assertEqual(APIClient().get(link).status_code, 401)
+
+    def test_access_is_checked_and_nginx_sends_the_bytes(self):
+        outsider = User.objects.create(username='outsider', role='STUDENT', department=self.department)
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(f'/api/files/material/{self.material.pk}/').status_code, 403)
+
+        self.client.force_authenticate(self.student)
+        with override_settings(MEDIA_ACCEL_REDIRECT=True):
+            response = self.client.get(f'/api/files/material/{self.material.pk}/')
+        self.assertEqual(response.status_code, 200)
+        sha256 = hashlib.sha256(b'%PDF-1.4 lecture').hexdigest()
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/blobs/{sha256[:2]}/{sha256}')
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), UPLOAD_MAX_CHUNK_SIZE=4)
+class ChunkedUploadTests(PortalTestCase):
+    data = b'0123456789'
+
+    def start(self, data=None):
+        data = data or self.data
+        response = self.client.post('/api/uploads/', {
+            'course_code': 'EE401', 'title': 'Lecture 12', 'filename': 'Lecture_12.pdf',
+            'size': len(data), 'sha256': hashlib.sha256(data).hexdigest(),
+        })
+        self.assertEqual(response.status_code, 201)
+        return f"/api/uploads/{response.data['id']}/"
+
+    def put(self, url, offset, chunk, **headers):
+        return self.client.put(url, chunk, content_type='application/octet-stream',
+                               headers={'Upload-Offset': str(offset), **headers})
+
+    def test_interrupted_upload_resumes_and_completes(self):
+        url = self.start()
+        self.assertEqual(self.put(url, 0, self.data[:4]).data['received'], 4)
+        # A corrupted chunk is dropped; the client asks where to resume
+        bad = self.put(url, 4, b'xxxx', **{'Chunk-SHA256': hashlib.sha256(self.data[4:8]).hexdigest()})
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(self.put(url, 0, self.data[:4]).status_code, 409)
+        offset = self.client.get(url).data['received']
+        for start in range(offset, len(self.data), 4):
+            self.put(url, start, self.data[start:start + 4])
+
+        # The file is moved into the store on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url + 'complete/')
+        self.assertEqual(response.status_code, 201)
+        material = Material.objects.get(pk=response.data['material'])
+        self.assertEqual(material.file.read(), self.data)
+
+    def test_checksum_mismatch_resets_the_upload(self):
+        url = self.start()
+        for start in range(0, len(self.data), 4):
+            self.put(url, start, b'z' * len(self.data[start:start + 4]))
+        response = self.client.post(url + 'complete/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['received'], 0)
+        self.assertFalse(Material.objects.exists())
+
+    def test_only_assigned_doctors_upload(self):
+        self.client.force_authenticate(self.make_students(1)[0])
+        response = self.client.post('/api/uploads/', {
+            'course_code': 'EE401', 'filename': 'x.pdf', 'size': 1, 'sha256': '0' * 64,
+        })
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_fields_are_rejected(self):
+        valid = {'course_code': 'EE401', 'title': 'Lecture', 'filename': 'x.pdf', 'size': 1, 'sha256': 'a' * 64}
+        for field, value in [('sha256', 'g' * 64), ('title', 't' * 201), ('filename', 'f' * 252 + '.pdf')]:
+            response = self.client.post('/api/uploads/', {**valid, field: value})
+            self.assertEqual(response.status_code, 400, field)
+            self.assertIn(field, response.data['error'])
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_withdrawn_assignment_stops_the_upload(self):
+        url = self.start()
+        self.assertEqual(self.put(url, 0, self.data[:4]).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            TeachingAssignment.objects.filter(doctor=self.doctor).delete()
+        self.client.force_authenticate(User.objects.get(pk=self.doctor.pk))
+        self.assertEqual(self.put(url, 4, self.data[4:8]).status_code, 403)
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 403)
+        self.assertFalse(Material.objects.exists())
+
+    def test_racing_completes_create_one_material(self):
+        url = self.start()
+        for start in range(0, len(self.data), 4):
+            self.put(url, start, self.data[start:start + 4])
+        first, second = UploadSession.objects.all()[0], UploadSession.objects.all()[0]
+
+        uploads.complete(first)
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.complete(second)
+        self.assertEqual(raised.exception.status, 409)
+        self.assertEqual(Material.objects.count(), 1)
+        self.assertEqual(UploadSession.objects.get().material_id, first.material.pk)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ContentAddressedStorageTests(PortalTestCase):
+    def upload(self, name, data=b'%PDF-1.4 same lecture'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Material.objects.create(course=self.course, title=name, file=SimpleUploadedFile(name, data))
+
+    def test_identical_uploads_share_one_file(self):
+        first, second = self.upload('Week_1.pdf'), self.upload('Lecture_1_copy.pdf')
+        other = self.upload('Week_2.pdf', b'%PDF-1.4 another lecture')
+
+        self.assertEqual(first.file.path, second.file.path)
+        self.assertNotEqual(first.file.path, other.file.path)
+        self.assertTrue(second.file.name.endswith('/Lecture_1_copy.pdf'))
+        self.assertEqual(Blob.objects.get(sha256=hashlib.sha256(b'%PDF-1.4 same lecture').hexdigest()).refs, 2)
+
+        # The file stays until its last material is gone
+        path = first.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/api/material/{first.pk}/delete/').status_code, 200)
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(Blob.objects.count(), 1)
+
+    def test_replaced_certificate_releases_the_old_file(self):
+        student = self.make_students(1)[0]
+        certificate = Certificate.objects.create(student=student, file=SimpleUploadedFile('c.pdf', b'old'))
+        old_path = certificate.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            certificate.file = SimpleUploadedFile('c.pdf', b'new')
+            certificate.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(certificate.file.open('rb').read(), b'new')
+
+    def test_reuploading_the_same_file_keeps_one_reference(self):
+        student = self.make_students(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            certificate = Certificate.objects.create(student=student, file=SimpleUploadedFile('c.pdf', b'same'))
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                certificate.file = SimpleUploadedFile('c.pdf', b'same')
+                certificate.save()
+        self.assertEqual(Blob.objects.get().refs, 1)
+
+        path = certificate.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            certificate.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_rolled_back_upload_leaves_no_file(self):
+        try:
+            with transaction.atomic():
+                material = Material.objects.create(
+                    course=self.course, title='x', file=SimpleUploadedFile('x.pdf', b'rolled back')
+                )
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        self.assertFalse(os.path.exists(material.file.path))
+        self.assertFalse(Blob.objects.exists())
+
+        # Its temporary file is swept later
+        call_command('purge_uploads', hours=-1, stdout=io.StringIO())
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'blobs', 'tmp')), [])
+
+    def test_chunked_upload_of_stored_content_adds_a_reference(self):
+        data = b'%PDF-1.4 same lecture'
+        material = self.upload('Week_1.pdf', data)
+        response = self.client.post('/api/uploads/', {
+            'course_code': 'EE401', 'title': 'Again', 'filename': 'again.pdf',
+            'size': len(data), 'sha256': hashlib.sha256(data).hexdigest(),
+        })
+        url = f"/api/uploads/{response.data['id']}/"
+        self.client.put(url, data, content_type='application/octet-stream', headers={'Upload-Offset': '0'})
+        again = Material.objects.get(pk=self.client.post(url + 'complete/').data['material'])
+
+        self.assertEqual(again.file.path, material.file.path)
+        self.assertEqual(Blob.objects.get().refs, 2)
+
+
+class DoctorQueryCountTests(PortalTestCase):
+    """Doctor endpoints cost the same number of queries for one course or many (no N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # A realistic faculty: 200 doctors, 1,000 assignments over 100 courses
+        courses = Course.objects.bulk_create([
+            Course(name=f'Course {i}', code=f'C{i:03d}', department=cls.department, level=cls.level)
+            for i in range(100)
+        ])
+        doctors = User.objects.bulk_create([User(username=f'dr_{i:03d}', role='DOCTOR') for i in range(200)])
+        TeachingAssignment.objects.bulk_create([
+            TeachingAssignment(doctor=doctor, course=courses[(i * 5 + k) % 100], academic_year=cls.year,
+                               level=cls.level, semester='1')
+            for i, doctor in enumerate(doctors) for k in range(5)
+        ])
+        cls.busy_doctor = doctors[0]
+        cls.busy_course = courses[0]
+
+        students = User.objects.bulk_create([
+            User(username=f'3020202{i:07d}', first_name=f'Student {i}', role='STUDENT',
+                 department=cls.department, level=cls.level)
+            for i in range(40)
+        ])
+        Exam.objects.bulk_create([
+            Exam(course=course, date=datetime.date(2026, 1, 10 + n), time=datetime.time(9), location='Hall 1')
+            for course in courses[:5] + [cls.course] for n in range(3)
+        ])
+        for course, cohort in ((cls.busy_course, students), (cls.course, students[:1])):
+            Grade.objects.bulk_create([Grade(student=s, course=course, score=70, semester='1') for s in cohort])
+            Attendance.objects.bulk_create([
+                Attendance(student=s, course=course, attended_lectures=8, total_lectures=10) for s in cohort
+            ])
+
+    def count_queries(self, doctor, course):
+        endpoints = [
+            '/api/doctor/courses/',
+            '/api/doctor/exams/',
+            f'/api/doctor/grades/?course_id={course.id}',
+            f'/api/doctor/attendance/?course_id={course.id}',
+            f'/api/courses/{course.id}/materials/',
+        ]
+        counts = {}
+        for url in endpoints:
+            cache.clear()
+            # A fresh user object: the assigned course ids are memoized on it
+            self.client.force_authenticate(User.objects.get(pk=doctor.pk))
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            counts[url.replace(str(course.id), '<id>')] = len(queries)
+        return counts
+
+    def test_doctor_endpoints_do_not_grow_with_the_data(self):
+        light = self.count_queries(self.doctor, self.course)  # 1 course, 3 exams, 1 student
+        busy = self.count_queries(self.busy_doctor, self.busy_course)  # 5 courses, 15 exams, 40 students
+        self.assertEqual(light, busy)
+        self.assertEqual(busy['/api/doctor/courses/'], 1)
+        self.assertEqual(busy['/api/doctor/exams/'], 2)  # assigned course ids, exams with their course
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_PUBLISH_INTERVAL=0)
+class ProfilingTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        profiling.reset()
+        self.admin = User.objects.create(username='admin_1', role='ADMIN')
+
+    def test_samples_are_aggregated_per_url_name(self):
+        for _ in range(3):
+            self.client.get('/api/doctor/courses/')
+
+        self.client.force_authenticate(self.admin)
+        report = self.client.get('/api/profiling/').data
+        endpoint = next(e for e in report['endpoints'] if e['name'] == 'get_doctor_courses')
+        self.assertEqual(endpoint['samples'], 3)
+        self.assertEqual(endpoint['queries']['max'], 1)
+        self.assertIn('core_teachingassignment', endpoint['slowest_queries'][0]['sql'])
+        self.assertGreater(endpoint['total_ms']['max'], 0)
+
+        out = io.StringIO()
+        call_command('profile_report', '--reset', stdout=out)
+        self.assertIn('get_doctor_courses', out.getvalue())
+        self.assertEqual(profiling.report(profiling.collect())['endpoints'], [])
+
+    def test_admins_only_and_off_by_default(self):
+        self.assertEqual(self.client.get('/api/profiling/').status_code, 403)
+        with override_settings(PROFILING_SAMPLE_RATE=0):
+            self.client.get('/api/doctor/courses/')
+        self.client.force_authenticate(self.admin)
+        names = [e['name'] for e in self.client.get('/api/profiling/').data['endpoints']]
+        self.assertNotIn('get_doctor_courses', names)
+
+    def test_serializer_time_is_measured_once(self):
+        profiling.ProfilingMiddleware(lambda request: None)
+        departments = Department.objects.all()
+        with profiling._Profile() as profile:
+            DepartmentSerializer(departments, many=True).data
+        self.assertGreater(profile.serialize_time, 0)
+        self.assertFalse(profile.serializing)
+        self.assertLessEqual(profile.serialize_time, (profile.end - profile.start) * 1000)
+        self.assertEqual(profile.sample()[2], round(profile.serialize_time, 2))
+
+    def test_every_worker_keeps_its_own_slot(self):
+        for pid in (101, 102, 103):
+            with patch('core.profiling.os.getpid', return_value=pid):
+                profiling.record('worker_view', (1.0, 0.0, 0.0, 0.0, 0))
+                profiling._state['slot'] = None
+                profiling.publish()
+        self.assertEqual(set(profiling.collect()), {101, 102, 103})
+        profiling.reset()
+        self.assertEqual(profiling.collect(), {})
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_command_and_every_case_succeeds(self):
+        out = io.StringIO()
+        call_command('seed_university', students=40, departments=2, levels=2, courses_per_cohort=2, stdout=out)
+        self.assertIn('40 students', out.getvalue())
+
+        results = run_benchmarks(repeat=1, upload_rows=20, student_rows=5)
+        self.assertIn('admin users_user_changelist', results)
+        for name, result in results.items():
+            self.assertLess(result['status'], 400, name)
+        self.assertEqual(results['upload grades (20 rows)']['status'], 201)
+
+
+class StudentSearchTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        student_index.seq = None  # rebuilt from this test's data
+        self.staff = User.objects.create(username='staff_1', role='STAFF_AFFAIRS')
+        self.client.force_authenticate(self.staff)
+        User.objects.bulk_create([
+            User(username='30201010100001', first_name='Mohamed Ahmed Ali', national_id='29901011234567',
+                 role='STUDENT', department=self.department, level=self.level),
+            User(username='30201010100002', first_name='Mona Hassan', national_id='29902021234567',
+                 role='STUDENT', department=self.department),
+            User(username='30201010200003', first_name='Ahmed Samir', role='STUDENT'),
+        ])
+
+    def search(self, q, **params):
+        response = self.client.get('/api/students/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['username'] for row in response.data]
+
+    def test_prefix_fuzzy_and_filters(self):
+        self.assertEqual(self.search('302010101'), ['30201010100001', '30201010100002'])
+        self.assertEqual(self.search('2990202'), ['30201010100002'])
+        self.assertEqual(self.search('mo'), ['30201010100001', '30201010100002'])
+        # Every word must match; exact words rank before prefixes
+        self.assertEqual(self.search('ahmed'), ['30201010100001', '30201010200003'])
+        self.assertEqual(self.search('ahm sam'), ['30201010200003'])
+        # Typo
+        self.assertEqual(self.search('mohamad'), ['30201010100001'])
+        self.assertEqual(self.search('ahmed', level='fourth year'), ['30201010100001'])
+        self.assertEqual(self.search('mo', limit=1), ['30201010100001'])
+        # Not a student
+        self.assertEqual(self.search('dr_h'), [])
+
+    def test_index_follows_saves_without_rebuilding(self):
+        self.search('x')
+        built_at = student_index.built_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student = User.objects.create(username='30201019900009', first_name='Youssef Kamal', role='STUDENT')
+        self.assertEqual(self.search('yous'), ['30201019900009'])
+        with self.captureOnCommitCallbacks(execute=True):
+            student.first_name = 'Yasser Kamal'
+            student.save()
+        self.assertEqual(self.search('yous'), [])
+        self.assertEqual(self.search('yasser'), ['30201019900009'])
+        with self.captureOnCommitCallbacks(execute=True):
+            student.delete()
+        self.assertEqual(self.search('kamal'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/upload-students/', {'file': make_sheet(
+                ['department', 'level', 'student_id', 'student_name'],
+                [['Electrical Engineering', 'Fourth Year', '30201018800008', 'Kareem Adel']],
+            )}, format='multipart')
+        self.assertEqual(self.search('kareem'), ['30201018800008'])
+        self.assertEqual(student_index.built_at, built_at)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.doctor)
+        self.assertEqual(self.client.get('/api/students/search/', {'q': 'mo'}).status_code, 403)
+
+
+class ReferenceDataTests(PortalTestCase):
+    def test_one_cacheable_response(self):
+        response = self.client.get('/api/reference/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=86400')
+        self.assertEqual([d['code'] for d in response.data['departments']], ['EE'])
+        self.assertEqual([y['year'] for y in response.data['years']], ['2025-2026'])
+        self.assertEqual(response.data['courses'][0]['level'], self.level.id)
+
+        # Served from the process's snapshot, or not at all
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/reference/').data, response.data)
+            self.assertEqual(
+                self.client.get('/api/reference/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+            )
+
+    def test_changes_apply_after_commit(self):
+        etag = self.client.get('/api/reference/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(name='Civil Engineering', code='CE')
+            # Rows that may still roll back never reach a snapshot
+            self.assertIsNone(reference_data.get().get_id('department', 'civil engineering'))
+
+        self.assertIsNotNone(reference_data.get().get_id('department', 'CIVIL engineering'))
+        response = self.client.get('/api/reference/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['departments']), 2)
+
+    def test_ambiguous_names_are_rejected(self):
+        self.make_students(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(name='electrical engineering', code='EE2')
+        self.client.force_authenticate(User.objects.create(username='staff_1', role='STAFF_AFFAIRS'))
+
+        response = self.client.get('/api/students/', {'dept': 'Electrical Engineering'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('matches 2 departments', str(response.data['dept']))
+        search = self.client.get('/api/students/search/', {'q': 'student', 'dept': 'electrical engineering'})
+        self.assertEqual(search.status_code, 400)
+
+        sheet = make_sheet(STUDENT_HEADER, [['Electrical Engineering', 'Fourth Year', 1, 30101010000009.0, 'Sara']])
+        response = self.client.post('/api/upload-students/', {'file': sheet}, format='multipart')
+        self.assertEqual((response.data['created'], response.data['skipped']), (0, 1))
+
+    def test_name_filters_use_reference_ids(self):
+        self.make_students(2)
+        self.client.force_authenticate(User.objects.create(username='staff_1', role='STAFF_AFFAIRS'))
+        reference_data.get()
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/students/', {'dept': 'electrical ENGINEERING', 'level': 'Fourth Year'})
+        self.assertEqual(len(response.data), 2)
+        # Unknown names match nothing, without a query
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/students/', {'dept': 'Civil', 'level': 'Fourth Year'}).data, [])
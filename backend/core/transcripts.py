@@ -0,0 +1,90 @@
+"""
+Materialized student transcripts (core.models.StudentTranscript).
+
+A transcript is rebuilt from the student's grades whenever one of them
+changes: single saves go through signals, bulk uploads call
+refresh_transcripts() for the students of each batch. Rebuilding costs a
+few queries per batch of students, however many grades they have, and
+keeps reads down to a single row.
+"""
+from django.contrib.auth import get_user_model
+
+from .models import Grade, StudentTranscript, upsert
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+FIELDS = ['gpa', 'total_credits', 'earned_credits', 'graded_courses', 'semesters', 'updated_at']
+
+
+def _totals():
+    return {'points': 0.0, 'credits': 0, 'earned': 0, 'courses': 0}
+
+
+def _gpa(totals):
+    return round(totals['points'] / totals['credits'], 2) if totals['credits'] else None
+
+
+def summarize(rows):
+    """
+    Transcript fields per student from (student_id, score, semester,
+    credit_hours) rows. Ungraded courses (no score yet) are left out.
+    """
+    students = {}
+    for student_id, score, semester, credit_hours in rows:
+        if score is None:
+            continue
+        points = Grade.GRADE_POINTS[Grade.letter_for(score)]
+        by_semester = students.setdefault(student_id, {})
+        for totals in (by_semester.setdefault(None, _totals()), by_semester.setdefault(semester, _totals())):
+            totals['points'] += points * credit_hours
+            totals['credits'] += credit_hours
+            totals['earned'] += credit_hours if points > 0 else 0
+            totals['courses'] += 1
+
+    summaries = {}
+    for student_id, by_semester in students.items():
+        overall = by_semester.pop(None)
+        summaries[student_id] = {
+            'gpa': _gpa(overall),
+            'total_credits': overall['credits'],
+            'earned_credits': overall['earned'],
+            'graded_courses': overall['courses'],
+            'semesters': [
+                {'semester': semester, 'gpa': _gpa(t), 'credits': t['credits'],
+                 'earned_credits': t['earned'], 'courses': t['courses']}
+                for semester, t in sorted(by_semester.items())
+            ],
+        }
+    return summaries
+
+
+def empty_summary():
+    return {'gpa': None, 'total_credits': 0, 'earned_credits': 0, 'graded_courses': 0, 'semesters': []}
+
+
+def refresh_transcripts(student_ids, batch_size=BATCH_SIZE):
+    """Rebuild the transcripts of these students (at most three queries per batch)."""
+    student_ids = sorted(set(student_ids))
+    for start in range(0, len(student_ids), batch_size):
+        chunk = student_ids[start:start + batch_size]
+
+        # 1. Every grade of the batch, with its course's credit hours
+        rows = Grade.objects.filter(student_id__in=chunk).values_list(
+            'student_id', 'score', 'semester', 'course__credit_hours'
+        )
+        summaries = summarize(rows)
+
+        # 2. Students without grades get an empty transcript, unless they were just deleted
+        missing = [pk for pk in chunk if pk not in summaries]
+        if missing:
+            for pk in User.objects.filter(pk__in=missing).values_list('pk', flat=True):
+                summaries[pk] = empty_summary()
+
+        # 3. One upsert for the batch
+        upsert(
+            StudentTranscript,
+            [StudentTranscript(student_id=pk, **fields) for pk, fields in summaries.items()],
+            ['student'],
+            FIELDS,
+        )
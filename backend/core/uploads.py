@@ -0,0 +1,151 @@
+"""
+Chunked, resumable Material uploads.
+
+    POST   /api/uploads/                 start: course_code, title, filename, size, sha256
+    PUT    /api/uploads/<id>/            one chunk as the raw body, at header Upload-Offset
+    GET    /api/uploads/<id>/            how much arrived (resume from `received`)
+    POST   /api/uploads/<id>/complete/   verify the SHA-256 and create the Material
+    DELETE /api/uploads/<id>/            abort
+
+Each chunk is copied from the request stream to the part file in small
+blocks, so neither Django nor nginx (proxy_request_buffering off) holds it
+in memory. A chunk may carry its own Chunk-SHA256 header; a bad or cut-off
+chunk is truncated away and can simply be sent again.
+"""
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Material, UploadSession
+from .storage import content_storage
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def part_path(session):
+    # Under MEDIA_ROOT, so storing the finished file is a rename on the same filesystem
+    return os.path.join(settings.MEDIA_ROOT, 'uploads', f'{session.pk}.part')
+
+
+def start(session):
+    if session.size <= 0 or session.size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"Size must be between 1 byte and {settings.UPLOAD_MAX_SIZE} bytes")
+    if not re.fullmatch(r'[0-9a-fA-F]{64}', session.sha256):
+        raise UploadError("sha256 must be the hex SHA-256 of the whole file")
+    for field in ('title', 'filename'):
+        max_length = UploadSession._meta.get_field(field).max_length
+        if len(getattr(session, field)) > max_length:
+            raise UploadError(f"{field} must be at most {max_length} characters")
+    session.sha256 = session.sha256.lower()
+    session.save()
+    os.makedirs(os.path.dirname(part_path(session)), exist_ok=True)
+    open(part_path(session), 'wb').close()
+    return session
+
+
+def _copy(stream, fh, length):
+    """Copy `length` bytes from the request to the file; returns (bytes copied, sha256)."""
+    digest = hashlib.sha256()
+    copied = 0
+    while copied < length:
+        data = stream.read(min(BLOCK_SIZE, length - copied))
+        if not data:
+            break
+        fh.write(data)
+        digest.update(data)
+        copied += len(data)
+    return copied, digest.hexdigest()
+
+
+def append_chunk(session, offset, stream, length, chunk_sha256=None):
+    # 1. Chunks must arrive in order; the client resumes from `received`
+    if session.status != 'OPEN':
+        raise UploadError("Upload already completed", status=409)
+    if offset != session.received:
+        raise UploadError(f"Expected offset {session.received}", status=409)
+    if length <= 0 or length > settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f"Chunks must be 1 to {settings.UPLOAD_MAX_CHUNK_SIZE} bytes", status=413)
+    if offset + length > session.size:
+        raise UploadError("Chunk goes past the declared size")
+
+    # 2. Stream it to disk, dropping whatever an interrupted earlier attempt left behind
+    with open(part_path(session), 'r+b') as fh:
+        fh.seek(offset)
+        fh.truncate()
+        copied, digest = _copy(stream, fh, length)
+        if copied != length or (chunk_sha256 and digest != chunk_sha256.lower()):
+            fh.truncate(offset)
+            raise UploadError("Chunk incomplete or corrupted; send it again")
+
+    # 3. Move the offset on, unless another request got there first
+    updated = UploadSession.objects.filter(pk=session.pk, received=offset).update(
+        received=offset + length, updated_at=timezone.now()
+    )
+    if not updated:
+        raise UploadError("Concurrent upload to the same offset", status=409)
+    session.received = offset + length
+    return session
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete(session):
+    if session.status != 'OPEN':
+        raise UploadError("Upload already completed", status=409)
+    if session.received != session.size:
+        raise UploadError(f"Upload incomplete: {session.received} of {session.size} bytes")
+
+    path = part_path(session)
+    if file_sha256(path) != session.sha256:
+        # Start over rather than keep bytes we can't trust
+        open(path, 'wb').close()
+        UploadSession.objects.filter(pk=session.pk, status='OPEN').update(received=0, updated_at=timezone.now())
+        session.received = 0
+        raise UploadError("Checksum mismatch; the upload was reset")
+
+    with transaction.atomic():
+        # 1. Claim the session; of two concurrent completes only one updates the row
+        claimed = UploadSession.objects.filter(pk=session.pk, status='OPEN', received=session.size).update(
+            status='COMPLETE', updated_at=timezone.now()
+        )
+        if not claimed:
+            raise UploadError("Upload already completed", status=409)
+
+        # 2. The hash is known: hand the part file to the store (a rename, or nothing if already stored)
+        name = content_storage.store(path, session.filename, session.sha256, session.size)
+        session.material = Material.objects.create(course=session.course, title=session.title, file=name)
+        UploadSession.objects.filter(pk=session.pk).update(material=session.material)
+    session.status = 'COMPLETE'
+    return session.material
+
+
+def discard(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def purge_stale(older_than):
+    """Drop open uploads untouched since `older_than`; returns how many."""
+    stale = list(UploadSession.objects.filter(status='OPEN', updated_at__lt=older_than))
+    for session in stale:
+        discard(session)
+    return len(stale)
@@ -1,14 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# The dashboard reads have async twins for the ASGI stack (see core.async_views)
+if settings.ASYNC_STUDENT_VIEWS:
+    from . import async_views as student_views
+else:
+    student_views = views
+
 urlpatterns = [
-    path('courses/', views.get_courses, name='get_courses'),
-    path('my-grades/', views.get_my_grades, name='get_my_grades'),
+    path('courses/', student_views.get_courses, name='get_courses'),
+    path('my-grades/', student_views.get_my_grades, name='get_my_grades'),
     path('upload-grades/', views.UploadGradesView.as_view(), name='upload_grades'),
-    path('news/', views.get_news, name='get_news'),
+    path('news/', student_views.get_news, name='get_news'),
     path('doctor/grades/', views.ManageGradesView.as_view(), name='doctor_grades'),
     path('doctor/grades/<int:pk>/update/', views.update_grade, name='update_grade'),
-    path('my-attendance/', views.get_my_attendance, name='get_my_attendance'),
+    path('my-transcript/', views.get_my_transcript, name='get_my_transcript'),
+    path('transcripts/', views.list_transcripts, name='list_transcripts'),
+    path('analytics/grades/', views.grade_analytics, name='grade_analytics'),
+    path('files/<str:kind>/<int:pk>/', views.download_file, name='download_file'),
+    path('uploads/', views.start_upload, name='start_upload'),
+    path('uploads/<int:pk>/', views.upload_session, name='upload_session'),
+    path('uploads/<int:pk>/complete/', views.complete_upload, name='complete_upload'),
+    path('export/grades/', views.export_grades, name='export_grades'),
+    path('export/attendance/', views.export_attendance, name='export_attendance'),
+    path('export/students/', views.export_students, name='export_students'),
+    path('my-attendance/', student_views.get_my_attendance, name='get_my_attendance'),
     path('upload-attendance/', views.UploadAttendanceView.as_view(), name='upload_attendance'),
     path('upload-material/', views.UploadMaterialView.as_view(), name='upload_material'),
     path('courses/<int:course_id>/materials/', views.get_course_materials, name='get_course_materials'),
@@ -17,8 +34,10 @@ urlpatterns = [
     path('departments/', views.DepartmentListCreateView.as_view(), name='department_list_create'),
     path('years/', views.AcademicYearListCreateView.as_view(), name='year_list_create'),
     path('levels/', views.LevelListCreateView.as_view(), name='level_list_create'),
+    path('reference/', views.get_reference_data, name='reference_data'),
     path('upload-students/', views.UploadStudentsView.as_view(), name='upload_students'),
     path('students/', views.list_students, name='list_students'),
+    path('students/search/', views.search_students, name='search_students'),
     path('students/<int:pk>/manage/', views.manage_student, name='manage_student'),
     path('years/<int:pk>/', views.AcademicYearDetailView.as_view(), name='year_detail'),
     path('levels/<int:pk>/', views.LevelDetailView.as_view(), name='level_detail'),
@@ -28,5 +47,7 @@ urlpatterns = [
     path('profile/', views.get_user_profile, name='user_profile'),
     path('doctor/exams/', views.ManageExamsView.as_view(), name='doctor_exams'),
     path('doctor/exams/<int:pk>/delete/', views.delete_exam, name='delete_exam'),
-    path('student/exams/', views.get_student_exams, name='student_exams'),
+    path('student/exams/', student_views.get_student_exams, name='student_exams'),
+    path('jobs/<int:pk>/', views.get_import_job, name='import_job'),
+    path('profiling/', views.profiling_report, name='profiling_report'),
 ]
\ No newline at end of file
@@ -1,10 +1,12 @@
-import pandas as pd
+import datetime
+
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from .models import Course, Grade
 from .serializers import CourseSerializer, GradeSerializer
@@ -24,41 +26,109 @@ from .models import TeachingAssignment
 from .models import Certificate
 from .serializers import CertificateSerializer
 from django.db import IntegrityError
+from django.db.models import F
 from rest_framework.exceptions import ValidationError
 from .models import Exam
 from .serializers import ExamSerializer
+from .importers import import_sheet, MissingColumnError, NotAssignedError
+from .models import ImportJob
+from .serializers import ImportJobSerializer
+from .jobs import enqueue_import, job_progress
+from .cache import cached_per_user, cached_result, conditional_get, records_scope
+from .pagination import IdCursorPagination, wants_pages
+from .permissions import IsAssignedToCourse, assigned_course_ids, is_assigned
+from .routers import read_from_replica
+from .models import StudentTranscript
+from .serializers import StudentTranscriptSerializer
+from .transcripts import empty_summary
+from .analytics import grade_statistics
+from .exports import attendance_rows, export_response, grade_rows, student_rows
+from .downloads import FILES, file_response, link_period, signed_user_id
+from . import uploads
+from .models import UploadSession
+from .serializers import UploadSessionSerializer
+from . import profiling
+from .search import student_index
+from .cache import REFERENCE_SCOPE
+from .reference import AmbiguousName, reference_data
 
 User = get_user_model()
 
 
+def wants_async(request):
+    # Uploads run in the background when the client sends async=1
+    flag = request.data.get('async', request.query_params.get('async', ''))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def queued_response(request, kind, file_obj):
+    job = enqueue_import(kind, file_obj, request.user)
+    return Response(
+        {"status": "Upload queued.", "job_id": job.id, "status_url": f"/api/jobs/{job.id}/"},
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+def student_course_context(request, courses):
+    """
+    Serializer context for CourseSerializer(many=True): the user's grades,
+    attendance and each course's next exam, keyed by course id.
+    Three queries in total, however many courses are listed.
+    """
+    course_ids = [c.id for c in courses]
+    user = request.user
+
+    grades = Grade.objects.filter(student=user, course_id__in=course_ids)
+    attendance = Attendance.objects.filter(student=user, course_id__in=course_ids)
+
+    # Upcoming exams in date order; the first one seen per course is the next one
+    next_exams = {}
+    upcoming = Exam.objects.filter(
+        course_id__in=course_ids, date__gte=datetime.date.today()
+    ).order_by('date', 'time')
+    for exam in upcoming:
+        next_exams.setdefault(exam.course_id, exam)
+
+    return {
+        'request': request,
+        'grades': {g.course_id: g for g in grades},
+        'attendance': {a.course_id: a for a in attendance},
+        'next_exams': next_exams,
+    }
+
 
 # 1. FILTERED COURSE LIST (Student Only)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_per_user('courses', scopes=('user', 'cohort', 'courses'))
+@read_from_replica
 def get_courses(request):
     user = request.user
     
     # If user is a Student, filter by their Dept + Level
     if user.role == 'STUDENT':
         # Safety check: Does the student have a profile set up?
-        if not user.department or not user.level:
+        if not user.department_id or not user.level_id:
             return Response([]) # Return empty if they aren't assigned yet
 
         courses = Course.objects.filter(
-            department=user.department,
-            level=user.level
+            department_id=user.department_id,
+            level_id=user.level_id
         )
     else:
         # If Admin/Staff, maybe show all? Or none. Let's show all for debug.
         courses = Course.objects.all()
-    
-    serializer = CourseSerializer(courses, many=True, context={'request': request})
+
+    courses = list(courses.select_related('department', 'level'))
+    serializer = CourseSerializer(courses, many=True, context=student_course_context(request, courses))
     return Response(serializer.data)
 
 
 # 2. FILTERED EXAM LIST (Student Only)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_per_user('student_exams', scopes=('cohort', 'courses'))
+@read_from_replica
 def get_student_exams(request):
     user = request.user
     
@@ -66,14 +136,14 @@ def get_student_exams(request):
         return Response({"error": "Students only"}, status=403)
     
     # Safety check
-    if not user.department or not user.level:
+    if not user.department_id or not user.level_id:
         return Response([])
 
     # Logic: Show exams ONLY for courses in the Student's Dept + Level
     exams = Exam.objects.filter(
-        course__department=user.department, 
-        course__level=user.level
-    ).order_by('date', 'time')
+        course__department_id=user.department_id, 
+        course__level_id=user.level_id
+    ).select_related('course').order_by('date', 'time')
     
     serializer = ExamSerializer(exams, many=True)
     return Response(serializer.data)
@@ -90,23 +160,123 @@ def get_user_profile(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_per_user('my_grades', scopes=('user', 'courses'))
+@read_from_replica
 def get_my_grades(request):
-    my_grades = Grade.objects.filter(student=request.user)
+    my_grades = Grade.objects.filter(student=request.user).select_related(
+        'course', 'student__department', 'student__level'
+    )
     serializer = GradeSerializer(my_grades, many=True)
     return Response(serializer.data)
 
 @api_view(['GET'])
+@conditional_get('news', scopes=('news',))
+@read_from_replica
 def get_news(request):
     # Fetch only public news
     news = News.objects.filter(is_public=True)
     serializer = NewsSerializer(news, many=True)
     return Response(serializer.data)
 
+# Transcript: one row, maintained by core.transcripts
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_per_user('my_transcript', scopes=('user', 'courses'))
+@read_from_replica
+def get_my_transcript(request):
+    user = request.user
+    transcript = StudentTranscript.objects.select_related(
+        'student__department', 'student__level'
+    ).filter(student_id=user.id).first()
+    if transcript is None:
+        # No grades yet
+        transcript = StudentTranscript(student=user, **empty_summary())
+    serializer = StudentTranscriptSerializer(transcript)
+    return Response(serializer.data)
+
+def cohort_filters(request, prefix=''):
+    """
+    {field: id} for the `dept`/`level` names in the query string (core.reference),
+    or None when a name matches nothing. A name shared by several departments or
+    levels is rejected, as the importers reject it.
+    """
+    filters = {}
+    for param, kind in (('dept', 'department'), ('level', 'level')):
+        name = request.query_params.get(param)
+        if not name:
+            continue
+        try:
+            pk = reference_data.get().get_id(kind, name)
+        except AmbiguousName as e:
+            raise ValidationError({param: str(e)})
+        if pk is None:
+            return None
+        filters[f'{prefix}{kind}_id'] = pk
+    return filters
+
+# Staff: transcripts of a department/level, best GPA first (one query)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_transcripts(request):
+    if request.user.role == 'STUDENT':
+        return Response({"error": "Staff only"}, status=403)
+
+    transcripts = StudentTranscript.objects.select_related(
+        'student__department', 'student__level'
+    ).order_by(F('gpa').desc(nulls_last=True), 'student__username')
+
+    cohort = cohort_filters(request, prefix='student__')
+    transcripts = transcripts.filter(**cohort) if cohort is not None else transcripts.none()
+
+    data = StudentTranscriptSerializer(transcripts, many=True).data
+    for rank, row in enumerate(data, start=1):
+        row['rank'] = rank
+    return Response(data)
+
+# Staff/doctors: grade and attendance statistics of a course, or of a department/level
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def grade_analytics(request):
+    user = request.user
+    if user.role == 'STUDENT':
+        return Response({"error": "Staff only"}, status=403)
+
+    course_id = request.query_params.get('course_id')
+    dept_name = request.query_params.get('dept')
+    level_name = request.query_params.get('level')
+    if not (course_id or dept_name or level_name):
+        return Response({"error": "Give a course_id, dept and/or level"}, status=400)
+
+    # 1. The courses in scope
+    courses = Course.objects.all()
+    if course_id:
+        if not course_id.isdigit():
+            return Response({"error": "Invalid course_id"}, status=400)
+        if not is_assigned(user, int(course_id)):
+            return Response({"error": "You are not assigned to teach this course."}, status=403)
+        courses = courses.filter(id=course_id)
+    elif user.role == 'DOCTOR':
+        # A department/level summary only covers the doctor's own courses
+        courses = courses.filter(id__in=assigned_course_ids(user))
+    cohort = cohort_filters(request)
+    courses = courses.filter(**cohort) if cohort is not None else courses.none()
+    course_ids = sorted(courses.values_list('id', flat=True))
+
+    # 2. Statistics, recomputed only after one of the courses' grades/attendance change
+    stats = cached_result(
+        'grade_analytics', [records_scope(pk) for pk in course_ids],
+        lambda: grade_statistics(Grade.objects.filter(course_id__in=course_ids)),
+    )
+    return Response({'courses': len(course_ids), **stats})
+
 # 1. Student: Get MY attendance
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_per_user('my_attendance', scopes=('user', 'courses'))
+@read_from_replica
 def get_my_attendance(request):
-    attendance = Attendance.objects.filter(student=request.user).order_by('-date')
+    # Attendance is a per-course summary (no date column any more); newest first
+    attendance = Attendance.objects.filter(student=request.user).select_related('course').order_by('-id')
     serializer = AttendanceSerializer(attendance, many=True)
     return Response(serializer.data)
 
@@ -120,52 +290,22 @@ class UploadAttendanceView(APIView):
             return Response({"error": "No file provided"}, status=400)
         
         file_obj = request.FILES['file']
+        if wants_async(request):
+            return queued_response(request, 'ATTENDANCE', file_obj)
+
         try:
-            df = pd.read_excel(file_obj)
-            processed = 0
-            
-            for index, row in df.iterrows():
-                try:
-                    # 1. Read Columns
-                    student_id = str(row['student_id']).strip()
-                    course_name = str(row['course_name']).strip()
-                    attended = int(row['attended_lectures']) # <--- NEW
-                    total = int(row['total_lectures'])       # <--- NEW
-                except KeyError as e:
-                    return Response({"error": f"Missing column: {e}"}, status=400)
-
-                # 2. Find Course by Name
-                try:
-                    course = Course.objects.get(name__iexact=course_name)
-                except Course.DoesNotExist:
-                    continue 
-
-                # 3. Security Check
-                if request.user.role == 'DOCTOR':
-                    is_assigned = TeachingAssignment.objects.filter(
-                        doctor=request.user, course=course
-                    ).exists()
-                    if not is_assigned:
-                        return Response({"error": f"Security Alert: Not assigned to {course_name}"}, status=403)
-
-                # 4. Update/Create Record
-                try:
-                    student = User.objects.get(username=student_id)
-                    Attendance.objects.update_or_create(
-                        student=student,
-                        course=course,
-                        defaults={
-                            'attended_lectures': attended,
-                            'total_lectures': total
-                        }
-                    )
-                    processed += 1
-                except User.DoesNotExist:
-                    pass
-
-            return Response({"status": f"Updated attendance for {processed} students!"}, status=201)
+            result = import_sheet('ATTENDANCE', file_obj, request.user)
+        except MissingColumnError as e:
+            return Response({"error": f"Missing column: {e}"}, status=400)
+        except NotAssignedError as e:
+            return Response({"error": f"Security Alert: Not assigned to {e.course_name}"}, status=403)
         except Exception as e:
             return Response({"error": str(e)}, status=400)
+
+        return Response(
+            {"status": f"Updated attendance for {result.processed} students!", **result.as_dict()},
+            status=201
+        )
         
 
 class UploadGradesView(APIView):
@@ -177,74 +317,32 @@ class UploadGradesView(APIView):
             return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
         file_obj = request.FILES['file']
+        if wants_async(request):
+            return queued_response(request, 'GRADES', file_obj)
         
         try:
-            df = pd.read_excel(file_obj)
-            
-            processed = 0
-            skipped = 0
-            
-            for index, row in df.iterrows():
-                try:
-                    # 1. Read ALL Requested Columns
-                    # Format: department | level | semester | student_id | student_name | course_name | score
-                    dept_name = str(row['department']).strip()
-                    level_name = str(row['level']).strip()
-                    semester = str(row['semester']).strip()
-                    course_name = str(row['course_name']).strip()
-                    student_id = str(row['student_id']).strip()
-                    student_name = str(row['student_name']).strip()
-                    score = row['score']
-                except KeyError as e:
-                    return Response({"error": f"Missing required column: {e}"}, status=400)
-
-                # 2. Find the Course by NAME
-                try:
-                    course = Course.objects.get(name__iexact=course_name)
-                except Course.DoesNotExist:
-                    print(f"Skipping: Course '{course_name}' not found.")
-                    skipped += 1
-                    continue
-
-                # 3. Security Check (Doctor Ownership)
-                if request.user.role == 'DOCTOR':
-                    is_assigned = TeachingAssignment.objects.filter(
-                        doctor=request.user, 
-                        course=course
-                    ).exists()
-                    
-                    if not is_assigned:
-                         return Response(
-                            {"error": f"Security Alert: You are not assigned to teach '{course_name}'."}, 
-                            status=status.HTTP_403_FORBIDDEN
-                        )
-
-                # 4. Find Student & Save Grade
-                try:
-                    student = User.objects.get(username=student_id)
-                    
-                    # (Optional) Validate Student matches Dept/Level in Excel?
-                    # For now, we trust the Student ID is correct.
-
-                    Grade.objects.update_or_create(
-                        student=student,
-                        course=course,
-                        defaults={'score': score, 'semester': semester}
-                    )
-                    processed += 1
-                except User.DoesNotExist:
-                    print(f"Student {student_id} ({student_name}) not found")
-                    skipped += 1
-
-            return Response({"status": f"Success! Processed: {processed}, Skipped: {skipped}"}, status=status.HTTP_201_CREATED)
-
+            # Courses, ownership and students are resolved per batch, not per row
+            result = import_sheet('GRADES', file_obj, request.user)
+
+        except MissingColumnError as e:
+            return Response({"error": f"Missing required column: {e}"}, status=400)
+        except NotAssignedError as e:
+            return Response(
+                {"error": f"Security Alert: You are not assigned to teach '{e.course_name}'."}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        return Response(
+            {"status": f"Success! Processed: {result.processed}, Skipped: {result.skipped}", **result.as_dict()},
+            status=status.HTTP_201_CREATED
+        )
+
 # 1. Doctor: Upload Material
 class UploadMaterialView(APIView):
     parser_classes = (MultiPartParser, FormParser)
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsAssignedToCourse]
 
     def post(self, request, *args, **kwargs):
         course_code = request.data.get('course_code')
@@ -256,17 +354,8 @@ class UploadMaterialView(APIView):
         except Course.DoesNotExist:
             return Response({"error": "Course not found"}, status=404)
 
-        # --- SECURITY CHECK FIX START ---
-        if request.user.role == 'DOCTOR':
-            # Check the TeachingAssignment table instead of course.doctor
-            is_assigned = TeachingAssignment.objects.filter(
-                doctor=request.user, 
-                course=course
-            ).exists()
-            
-            if not is_assigned:
-                return Response({"error": "Not your course! Assignment not found."}, status=403)
-        # --- SECURITY CHECK FIX END ---
+        # --- SECURITY CHECK (doctor must be assigned via TeachingAssignment) ---
+        self.check_object_permissions(request, course)
 
         Material.objects.create(course=course, title=title, file=file)
         return Response({"status": "Material uploaded!"})
@@ -274,16 +363,15 @@ class UploadMaterialView(APIView):
 # 2. Student: View Materials for a specific course
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+# Per user and per link period: the download links are signed for the requester and expire
+@conditional_get('course_materials', scopes=('materials:{course_id}',), per_user=True, key_part=link_period)
+@read_from_replica
 def get_course_materials(request, course_id):
-    materials = Material.objects.filter(course_id=course_id)
-    serializer = MaterialSerializer(materials, many=True)
+    # Newest first (served by the (course, uploaded_at) index)
+    materials = Material.objects.filter(course_id=course_id).order_by('-uploaded_at')
+    serializer = MaterialSerializer(materials, many=True, context={'request': request})
     return Response(serializer.data)
 
-class ManageGradesView(generics.ListCreateAPIView):
-    queryset = Grade.objects.all()
-    serializer_class = GradeSerializer
-    permission_classes = [IsAuthenticated] # In real app, check if user is Doctor
-
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def update_grade(request, pk):
@@ -301,8 +389,10 @@ def update_grade(request, pk):
 @permission_classes([IsAuthenticated])
 def get_doctor_courses(request):
     if request.user.role == 'DOCTOR':
-        # 1. Get all assignments for this doctor
-        assignments = TeachingAssignment.objects.filter(doctor=request.user)
+        # 1. Get all assignments for this doctor, with their course, department and level (one query)
+        assignments = TeachingAssignment.objects.filter(doctor=request.user).select_related(
+            'course__department', 'level'
+        )
         
         data = []
         for assign in assignments:
@@ -330,21 +420,11 @@ def delete_material(request, pk):
     try:
         material = Material.objects.get(pk=pk)
         
-        # --- SECURITY CHECK FIX START ---
-        # Check if this doctor is assigned to this course via the TeachingAssignment table
-        if request.user.role == 'DOCTOR':
-            is_assigned = TeachingAssignment.objects.filter(
-                doctor=request.user, 
-                course=material.course
-            ).exists()
-            
-            if not is_assigned:
-                return Response({"error": "Access Denied: You are not assigned to this course."}, status=403)
-        # --- SECURITY CHECK FIX END ---
+        # --- SECURITY CHECK (doctor must be assigned via TeachingAssignment) ---
+        if not is_assigned(request.user, material.course_id):
+            return Response({"error": "Access Denied: You are not assigned to this course."}, status=403)
         
-        # Delete the file from disk
-        material.file.delete() 
-        # Delete the record from DB
+        # Delete the record; its file goes with the last material or certificate sharing it
         material.delete()
         
         return Response({"status": "File deleted"})
@@ -377,6 +457,13 @@ class LevelListCreateView(generics.ListCreateAPIView):
         # 2. Proceed with creation
         serializer.save()
 
+# 4. Departments, levels, years and courses in one response, for clients to load once per session
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get('reference_data', scopes=(REFERENCE_SCOPE,), max_age=settings.REFERENCE_DATA_MAX_AGE)
+def get_reference_data(request):
+    return Response(reference_data.get().as_dict())
+
 class UploadStudentsView(APIView):
     parser_classes = (MultiPartParser, FormParser)
     permission_classes = [IsAuthenticated] 
@@ -386,55 +473,26 @@ class UploadStudentsView(APIView):
             return Response({"error": "No file provided"}, status=400)
 
         file_obj = request.FILES['file']
+        if wants_async(request):
+            return queued_response(request, 'STUDENTS', file_obj)
+
         try:
-            df = pd.read_excel(file_obj)
-            
-            created_count = 0
-            updated_count = 0
-            
-            for index, row in df.iterrows():
-                # 1. Read Columns (We use .get() or handle missing keys safely if needed)
-                # We expect: department, level, semester, student_id, student_name
-                
-                # Clean the data (convert to string and remove spaces)
-                dept_name = str(row['department']).strip()
-                level_name = str(row['level']).strip()
-                username = str(row['student_id']).strip()
-                full_name = str(row['student_name']).strip()
-                
-                # 2. Find Department & Level
-                try:
-                    # Case-insensitive search (__iexact) helps with "Electrical" vs "electrical"
-                    department = Department.objects.get(name__iexact=dept_name)
-                    level = Level.objects.get(name__iexact=level_name)
-                except (Department.DoesNotExist, Level.DoesNotExist):
-                    # If Dept/Level wrong, skip this student
-                    print(f"Skipping {username}: Dept '{dept_name}' or Level '{level_name}' not found.")
-                    continue
-
-                # 3. Create or Update User
-                user, created = User.objects.update_or_create(
-                    username=username,
-                    defaults={
-                        'first_name': full_name,
-                        'role': 'STUDENT',
-                        'department': department,
-                        'level': level,
-                    }
-                )
-                
-                if created:
-                    user.set_password(username) # Set Password = Student ID
-                    user.save()
-                    created_count += 1
-                else:
-                    updated_count += 1
-            
-            return Response({"status": f"Processed: {created_count} Created, {updated_count} Updated."})
+            # We expect: department, level, semester, student_id, student_name
+            # Department/Level maps are loaded once, passwords hashed in parallel
+            result = import_sheet('STUDENTS', file_obj, request.user)
+        except MissingColumnError as e:
+            return Response({"error": f"Missing column: {e}"}, status=400)
         except Exception as e:
-            # This catches errors like missing columns
+            # This catches errors like unreadable files
             return Response({"error": str(e)}, status=400)
 
+        return Response({
+            "status": f"Processed: {result.created} Created, {result.updated} Updated.",
+            "created": result.created,
+            "updated": result.updated,
+            **result.as_dict(),
+        })
+
 # 1. List Students (Filtered)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -442,14 +500,41 @@ def list_students(request):
     dept_name = request.query_params.get('dept')
     level_name = request.query_params.get('level')
     
-    students = User.objects.filter(role='STUDENT')
+    students = User.objects.filter(role='STUDENT').select_related('department', 'level')
     
-    if dept_name:
-        students = students.filter(department__name__iexact=dept_name)
-    if level_name:
-        students = students.filter(level__name__iexact=level_name)
+    cohort = cohort_filters(request)
+    students = students.filter(**cohort) if cohort is not None else students.none()
+
+    # Unfiltered listings (or clients asking for pages) get keyset pages
+    if wants_pages(request) or not (dept_name or level_name):
+        paginator = IdCursorPagination()
+        page = paginator.paginate_queryset(students, request)
+        serializer = StudentSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
         
-    serializer = StudentSerializer(students, many=True)
+    serializer = StudentSerializer(students, many=True, context={'request': request})
+    return Response(serializer.data)
+
+# Staff: typeahead over Student ID, name and national ID (see core.search)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_students(request):
+    if request.user.role not in ('STAFF_AFFAIRS', 'ADMIN'):
+        return Response({"error": "Unauthorized"}, status=403)
+
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({"error": "limit must be a number"}, status=400)
+
+    filters = cohort_filters(request)
+    if filters is None:
+        return Response([])
+
+    ids = student_index.search(query, limit=limit, **filters)
+    students = User.objects.select_related('department', 'level').in_bulk(ids)
+    serializer = StudentSerializer([students[pk] for pk in ids if pk in students], many=True)
     return Response(serializer.data)
 
 # 2. Edit/Delete Student
@@ -521,13 +606,21 @@ class LevelDetailView(generics.RetrieveUpdateDestroyAPIView):
 class ManageGradesView(generics.ListCreateAPIView):
     serializer_class = GradeSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
+        grades = Grade.objects.select_related('course', 'student__department', 'student__level')
         # Filter by course_id if provided in URL
         course_id = self.request.query_params.get('course_id')
         if course_id:
-            return Grade.objects.filter(course_id=course_id)
-        return Grade.objects.all() # Fallback
+            return grades.filter(course_id=course_id)
+        return grades # Fallback (always paginated)
+
+    def paginate_queryset(self, queryset):
+        # A single course's list stays a plain array unless the client asks for pages
+        if self.request.query_params.get('course_id') and not wants_pages(self.request):
+            return None
+        return super().paginate_queryset(queryset)
 
 # 2. Add ManageAttendanceView (New)
 class ManageAttendanceView(generics.ListAPIView):
@@ -537,7 +630,7 @@ class ManageAttendanceView(generics.ListAPIView):
     def get_queryset(self):
         course_id = self.request.query_params.get('course_id')
         if course_id:
-            return Attendance.objects.filter(course_id=course_id)
+            return Attendance.objects.filter(course_id=course_id).select_related('course')
         return Attendance.objects.none()
 
 # 1. Staff: Upload Certificate
@@ -600,7 +693,7 @@ def get_my_certificate(request):
 
     try:
         cert = Certificate.objects.get(student=request.user)
-        serializer = CertificateSerializer(cert)
+        serializer = CertificateSerializer(cert, context={'request': request})
         return Response(serializer.data)
     except Certificate.DoesNotExist:
         return Response({"error": "No certificate found"}, status=404)
@@ -608,24 +701,20 @@ def get_my_certificate(request):
 # 1. Doctor: Schedule Exam
 class ManageExamsView(generics.ListCreateAPIView):
     serializer_class = ExamSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsAssignedToCourse]
 
     def get_queryset(self):
         # Doctor sees exams for their assigned courses
         if self.request.user.role == 'DOCTOR':
-            # Find courses taught by this doctor
-            assignments = TeachingAssignment.objects.filter(doctor=self.request.user)
-            my_courses = [a.course for a in assignments]
-            return Exam.objects.filter(course__in=my_courses).order_by('date')
+            # Courses taught by this doctor (the same cached ids as the permission checks)
+            my_courses = assigned_course_ids(self.request.user)
+            return Exam.objects.filter(course_id__in=my_courses).select_related('course').order_by('date')
         return Exam.objects.none()
 
     def perform_create(self, serializer):
         # Security: Check if Doctor teaches this course
         course = serializer.validated_data['course']
-        if self.request.user.role == 'DOCTOR':
-            is_assigned = TeachingAssignment.objects.filter(doctor=self.request.user, course=course).exists()
-            if not is_assigned:
-                raise PermissionDenied("You are not assigned to teach this course.")
+        self.check_object_permissions(self.request, course)
         serializer.save()
 
 @api_view(['DELETE'])
@@ -634,12 +723,192 @@ def delete_exam(request, pk):
     try:
         exam = Exam.objects.get(pk=pk)
         # Security Check
-        if request.user.role == 'DOCTOR':
-            is_assigned = TeachingAssignment.objects.filter(doctor=request.user, course=exam.course).exists()
-            if not is_assigned:
-                return Response({"error": "Unauthorized"}, status=403)
+        if not is_assigned(request.user, exam.course_id):
+            return Response({"error": "Unauthorized"}, status=403)
         
         exam.delete()
         return Response({"status": "Exam cancelled"})
     except Exam.DoesNotExist:
         return Response(status=404)
+
+# Upload job status (polled by the client after an async upload)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_import_job(request, pk):
+    try:
+        job = ImportJob.objects.get(pk=pk)
+    except ImportJob.DoesNotExist:
+        return Response(status=404)
+
+    if job.created_by_id != request.user.id and request.user.role != 'ADMIN':
+        return Response({"error": "Unauthorized"}, status=403)
+
+    serializer = ImportJobSerializer(job, context={'progress': job_progress(job)})
+    return Response(serializer.data)
+
+
+# --- Exports (same columns as the upload templates; see core.exports) ---
+
+def export_type(request):
+    return 'xlsx' if request.query_params.get('type') == 'xlsx' else 'csv'
+
+def exported_course(request):
+    """The course being exported, or an error Response."""
+    if request.user.role == 'STUDENT':
+        return None, Response({"error": "Staff only"}, status=403)
+    try:
+        course = Course.objects.get(pk=request.query_params.get('course_id'))
+    except (Course.DoesNotExist, ValueError, TypeError):
+        return None, Response({"error": "Course not found"}, status=404)
+    if not is_assigned(request.user, course.id):
+        return None, Response({"error": "You are not assigned to teach this course."}, status=403)
+    return course, None
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_grades(request):
+    course, error = exported_course(request)
+    if error:
+        return error
+    return export_response('grades', course.code, grade_rows(course), export_type(request))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_attendance(request):
+    course, error = exported_course(request)
+    if error:
+        return error
+    return export_response('attendance', course.code, attendance_rows(course), export_type(request))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_students(request):
+    if request.user.role in ('STUDENT', 'DOCTOR'):
+        return Response({"error": "Staff only"}, status=403)
+
+    dept_name = request.query_params.get('dept')
+    level_name = request.query_params.get('level')
+    students = User.objects.filter(role='STUDENT')
+    cohort = cohort_filters(request)
+    students = students.filter(**cohort) if cohort is not None else students.none()
+
+    name = ' '.join(n for n in (dept_name, level_name) if n) or 'all'
+    return export_response('students', name, student_rows(students), export_type(request))
+
+
+# --- Protected file downloads (nginx sends the bytes; see core.downloads) ---
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def download_file(request, kind, pk):
+    # 1. Who is asking: the JWT header, or the user the link was signed for
+    user = request.user
+    if not user.is_authenticated:
+        user_id = signed_user_id(request.query_params.get('sig', ''), kind, pk)
+        user = User.objects.select_related('level').filter(pk=user_id, is_active=True).first() if user_id else None
+        if user is None:
+            return Response({"error": "Authentication required"}, status=401)
+
+    # 2. May they have this file?
+    if kind not in FILES:
+        return Response({"error": "File not found"}, status=404)
+    queryset, allowed = FILES[kind]
+    obj = queryset.filter(pk=pk).first()
+    if obj is None or not obj.file:
+        return Response({"error": "File not found"}, status=404)
+    if not allowed(user, obj):
+        return Response({"error": "You do not have access to this file."}, status=403)
+
+    return file_response(obj.file)
+
+
+# --- Chunked material uploads (see core.uploads) ---
+
+NOT_ASSIGNED = {"error": "You are not assigned to teach this course."}
+
+def may_upload(user, course_id):
+    # Checked on every step: an assignment can be withdrawn while an upload is under way
+    return user.role != 'STUDENT' and is_assigned(user, course_id)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def start_upload(request):
+    try:
+        course = Course.objects.get(code=request.data.get('course_code'))
+    except Course.DoesNotExist:
+        return Response({"error": "Course not found"}, status=404)
+    if not may_upload(request.user, course.id):
+        return Response(NOT_ASSIGNED, status=403)
+
+    try:
+        session = uploads.start(UploadSession(
+            created_by=request.user, course=course,
+            title=request.data.get('title') or request.data.get('filename', ''),
+            filename=request.data.get('filename', 'upload'),
+            size=int(request.data.get('size', 0)),
+            sha256=request.data.get('sha256', ''),
+        ))
+    except ValueError:
+        return Response({"error": "size must be a number"}, status=400)
+    except uploads.UploadError as e:
+        return Response({"error": str(e)}, status=e.status)
+    return Response(UploadSessionSerializer(session).data, status=201)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_session(request, pk):
+    try:
+        session = UploadSession.objects.get(pk=pk, created_by=request.user)
+    except UploadSession.DoesNotExist:
+        return Response(status=404)
+
+    if request.method == 'PUT':
+        if not may_upload(request.user, session.course_id):
+            return Response(NOT_ASSIGNED, status=403)
+        # The raw body is the chunk; request.data is never touched, so nothing buffers it
+        try:
+            uploads.append_chunk(
+                session,
+                offset=int(request.headers.get('Upload-Offset', -1)),
+                stream=request.stream,
+                length=int(request.headers.get('Content-Length') or 0),
+                chunk_sha256=request.headers.get('Chunk-SHA256'),
+            )
+        except ValueError:
+            return Response({"error": "Upload-Offset must be a number"}, status=400)
+        except uploads.UploadError as e:
+            return Response({"error": str(e), "received": session.received}, status=e.status)
+    elif request.method == 'DELETE':
+        uploads.discard(session)
+        return Response(status=204)
+
+    return Response(UploadSessionSerializer(session).data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_upload(request, pk):
+    try:
+        session = UploadSession.objects.select_related('course').get(pk=pk, created_by=request.user)
+    except UploadSession.DoesNotExist:
+        return Response(status=404)
+    if not may_upload(request.user, session.course_id):
+        return Response(NOT_ASSIGNED, status=403)
+
+    try:
+        material = uploads.complete(session)
+    except uploads.UploadError as e:
+        return Response({"error": str(e), "received": session.received}, status=e.status)
+    return Response({**UploadSessionSerializer(session).data, "file": MaterialSerializer(
+        material, context={'request': request}).data['file']}, status=201)
+
+# Admins: sampled request profiles per endpoint (see core.profiling)
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def profiling_report(request):
+    if request.user.role != 'ADMIN' and not request.user.is_superuser:
+        return Response({"error": "Admins only."}, status=403)
+
+    if request.method == 'DELETE':
+        profiling.reset()
+        return Response(status=204)
+    return Response({"sample_rate": settings.PROFILING_SAMPLE_RATE, **profiling.current_report()})
@@ -0,0 +1,48 @@
+# Gunicorn settings for the production serving mode.
+#
+#   WSGI (default):  gunicorn bsu_portal.wsgi -c gunicorn.conf.py
+#   ASGI:            GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn bsu_portal.asgi -c gunicorn.conf.py
+#
+# Every value can be overridden from the environment. Graceful reload (new code,
+# no dropped requests): `kill -HUP <master pid>`, or `docker compose kill -s HUP backend`.
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Processes: one per core plus one, so a worker blocked on the DB never idles a core
+workers = env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() + 1)
+
+# gthread: each process serves GUNICORN_THREADS requests at once (the views mostly wait on MySQL)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = env_int('GUNICORN_THREADS', 4)
+
+# A request running longer than this is killed and its worker replaced
+timeout = env_int('GUNICORN_TIMEOUT', 60)
+# Time given to in-flight requests on reload/shutdown
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers now and then so slow leaks can't build up; jitter avoids all restarting at once
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+
+# Empty turns the access log off
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Behind nginx: trust its X-Forwarded-* headers
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '*')
+
+
+def post_worker_init(worker):
+    # Import jobs queued or left running by a worker that died (core.jobs)
+    from core.jobs import start_sweeper
+    start_sweeper()
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_academicyear_level_alter_news_options_and_more'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='level',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.level'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.CharField(choices=[('STUDENT', 'Student'), ('DOCTOR', 'Doctor'), ('STAFF_AFFAIRS', 'Staff Affairs'), ('ADMIN', 'Admin')], default='STUDENT', max_length=20),
+        ),
+    ]
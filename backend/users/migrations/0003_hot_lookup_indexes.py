@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0010_hot_lookup_indexes'),
+        ('users', '0002_user_department_user_level_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'department', 'level'], name='user_role_dept_level_idx'),
+        ),
+    ]
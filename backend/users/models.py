@@ -15,6 +15,10 @@ class User(AbstractUser):
     department = models.ForeignKey('core.Department', on_delete=models.SET_NULL, null=True, blank=True)
     level = models.ForeignKey('core.Level', on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta(AbstractUser.Meta):
+        # Student lists are filtered by role + department + level
+        indexes = [models.Index(fields=['role', 'department', 'level'], name='user_role_dept_level_idx')]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
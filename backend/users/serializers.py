@@ -1,6 +1,7 @@
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import User
 from rest_framework import serializers
+from core.serializers import DynamicFieldsMixin
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
@@ -13,7 +14,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         
         return data
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     level_name = serializers.CharField(source='level.name', read_only=True)
 
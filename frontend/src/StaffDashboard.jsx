@@ -10,6 +10,7 @@ import AddCircleOutlineIcon from '@mui/icons-material/AddCircleOutline';
 import VisibilityIcon from '@mui/icons-material/Visibility';
 import DeleteIcon from '@mui/icons-material/Delete';
 import { useLocation } from "react-router-dom"; // Add this for location state
+import { fetchReferenceData, referenceDataChanged } from "./services/api";
 
 export default function StaffDashboard() {
     const navigate = useNavigate();
@@ -30,19 +31,16 @@ export default function StaffDashboard() {
     const [dialogType, setDialogType] = useState("");
 
     useEffect(() => {
-        fetchData("/api/departments/", setDepartments);
-        fetchData("/api/years/", setYears);
-        fetchData("/api/levels/", setLevels);
+        // One cached request instead of departments/, years/ and levels/
+        fetchReferenceData()
+            .then((data) => {
+                setDepartments(data.departments);
+                setYears(data.years);
+                setLevels(data.levels);
+            })
+            .catch((err) => console.error(err));
     }, []);
 
-    const fetchData = async (url, setter) => {
-        const token = localStorage.getItem("access_token");
-        try {
-            const res = await axios.get(url, { headers: { Authorization: `Bearer ${token}` } });
-            setter(res.data);
-        } catch (err) { console.error(err); }
-    };
-
     const handleLogout = () => {
         localStorage.clear();
         navigate("/login");
@@ -79,6 +77,7 @@ export default function StaffDashboard() {
                 const res = await axios.post("/api/levels/", { name: newItemName }, { headers });
                 setLevels([...levels, res.data]);
             }
+            referenceDataChanged();
             setOpenDialog(false);
         } catch (err) {
             alert("Failed to create item. It might already exist or limit reached.");
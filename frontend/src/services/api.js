@@ -27,10 +27,16 @@ export const fetchNews = async () => {
   return response.data;
 };
 
-// Fetch ALL grades (Doctor View)
+// Fetch ALL grades (Doctor View): the server sends cursor pages, follow `next` to the end
 export const fetchAllGrades = async () => {
-  const response = await axios.get(`${API_URL}/doctor/grades/`, getAuthHeader());
-  return response.data;
+  let grades = [];
+  let url = `${API_URL}/doctor/grades/`;
+  while (url) {
+    const response = await axios.get(url, getAuthHeader());
+    grades = grades.concat(response.data.results);
+    url = response.data.next;
+  }
+  return grades;
 };
 
 // Update ONE grade
@@ -43,4 +49,16 @@ export const updateGrade = async (id, newScore) => {
 export const fetchCourseMaterials = async (courseId) => {
   const response = await axios.get(`${API_URL}/courses/${courseId}/materials/`, getAuthHeader());
   return response.data;
-};
\ No newline at end of file
+};
+// Departments, levels, years and courses in one request. The browser reuses
+// the response for a day; after this browser changes one of them, the `rev`
+// in the URL makes the next load ask the server again.
+export const fetchReferenceData = async () => {
+  const rev = localStorage.getItem("reference_rev") || "0";
+  const response = await axios.get(`${API_URL}/reference/?rev=${rev}`, getAuthHeader());
+  return response.data;
+};
+
+export const referenceDataChanged = () => {
+  localStorage.setItem("reference_rev", String(Date.now()));
+};